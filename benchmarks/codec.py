@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Codec Benchmark}                                          ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+# compares xml-rpc with the compact codecs on keyword reports of 1KB to 100MB
+#   rows : list of records (data collection keywords)
+#   blob : binary value
+# usage: python -m benchmarks.codec [--max 100MB] [--repeat 3] [--uri http://host:port]
+#   --uri also measures round trips on a running worker (threaded or async mode): the payload
+#   is stored with 'add_context' and read back with 'get_context'
+###################################################################################################
+from time import perf_counter as now
+import click
+
+SIZES = ['1KB', '10KB', '100KB', '1MB', '10MB', '100MB']
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# helpers
+# -------------------------------------------------------------------------------------------------
+def parse_size(text):
+    units = dict(KB=1 << 10, MB=1 << 20, GB=1 << 30)
+    text  = text.strip().upper()
+    for unit, factor in units.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+def payload(kind, size):
+    if kind == 'blob':
+        return bytes(range(256)) * (size // 256 or 1)
+    # ~64 bytes per record in json
+    return [dict(id=i, name=f'sample {i:08d}', value=i * 0.25, ok=bool(i & 1))
+            for i in range(size // 64 or 1)]
+
+def report(value):
+    return dict(status='PASS', output='', **{'return': value})
+
+def measure(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = now()
+        out   = func()
+        spent = now() - start
+        best  = spent if best is None else min(best, spent)
+    return best, out
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# codecs under test: name -> (encode, decode)
+# -------------------------------------------------------------------------------------------------
+def codecs():
+    from xmlrpc.client     import dumps, loads, Binary
+    from robotworker.codec import CODECS, dump_result, load_result
+    def xml_value(value):
+        return Binary(value) if isinstance(value, bytes) else value
+    out = dict(xml=(
+        lambda value: dumps((report(xml_value(value)),), methodresponse=True).encode('utf-8'),
+        lambda data : loads(data, use_builtin_types=True)[0][0]))
+    for codec in CODECS:
+        out[codec.name] = (
+            lambda value, codec=codec: dump_result(codec, report(value)),
+            lambda data,  codec=codec: load_result(codec, data))
+    return out
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# remote round trip (negotiated codec vs xml)
+# -------------------------------------------------------------------------------------------------
+def remote(uri, codec, value, repeat):
+    from robotworker.transport import Proxy, PoolTransport
+    proxy = Proxy(uri, PoolTransport(size=1, codec=codec))
+    proxy.get_keyword_names()
+    proxy.run_keyword('add_context', [{'benchmark': value}])
+    spent, _ = measure(lambda: proxy.run_keyword('get_context', []), repeat)
+    proxy.run_keyword('add_context', [{'benchmark': ''}])
+    return spent
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# command
+# -------------------------------------------------------------------------------------------------
+@click.command()
+@click.option('--max'   , 'limit', default='100MB', help='largest payload')
+@click.option('--repeat', default=3     , help='runs per measure (best is reported)')
+@click.option('--kind'  , default='rows', type=click.Choice(['rows', 'blob']))
+@click.option('--uri'   , default=None  , help='worker for round trip measures')
+def main(limit, repeat, kind, uri):
+    engines = codecs()
+    click.echo(f'{"SIZE":>8} {"CODEC":>8} {"BYTES":>12} {"ENCODE":>10} {"DECODE":>10}'
+               + (f' {"ROUNDTRIP":>10}' if uri else ''))
+    for size in [s for s in SIZES if parse_size(s) <= parse_size(limit)]:
+        value = payload(kind, parse_size(size))
+        for name, (encode, decode) in engines.items():
+            t_enc, data = measure(lambda: encode(value), repeat)
+            t_dec, _    = measure(lambda: decode(data), repeat)
+            line = f'{size:>8} {name:>8} {len(data):>12} {t_enc * 1e3:>8.2f}ms {t_dec * 1e3:>8.2f}ms'
+            if uri and kind == 'rows':
+                line += f' {remote(uri, name, value, repeat) * 1e3:>8.2f}ms'
+            click.echo(line)
+
+if __name__ == '__main__':
+    main()
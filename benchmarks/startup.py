@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Startup Benchmark}                                        ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+# measures the cold start of the 'work' commands against a local stand-in worker
+#   each command runs in a new interpreter, 'python -c pass' is the baseline
+# usage: python -m benchmarks.startup [--repeat 10] [--port 20990] [--command '. get_services']
+###################################################################################################
+from time import perf_counter as now
+import click
+
+COMMANDS = ['--help', '+', '. get_services', 'list']
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# stand-in worker (empty configuration)
+# -------------------------------------------------------------------------------------------------
+def start_worker(root, port):
+    from subprocess  import Popen, DEVNULL
+    from sys         import executable
+    from os.path     import join
+    conf = join(root, 'configuration.yml')
+    with open(conf, 'w') as f:
+        f.write('context: {}\n')
+    return Popen([executable, '-m', 'robotworker.worker',
+        '--conf', conf, '--log', join(root, 'worker.log'), '--port', str(port)],
+        stdout=DEVNULL, stderr=DEVNULL)
+
+def build_env(root, port):
+    from os.path            import join
+    from robotworker.client import Environment
+    path = join(root, 'env')
+    env  = Environment(path)
+    env.reset(f'http://127.0.0.1:{port}')
+    env.save()
+    env.check()
+    return path
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# run a command n times: (min, median) seconds
+# -------------------------------------------------------------------------------------------------
+def measure(args, repeat):
+    from subprocess import run, DEVNULL
+    from statistics import median
+    spent = []
+    for _ in range(repeat):
+        start = now()
+        run(args, stdout=DEVNULL, stderr=DEVNULL, check=True)
+        spent.append(now() - start)
+    return min(spent), median(spent)
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# command
+# -------------------------------------------------------------------------------------------------
+@click.command()
+@click.option('--repeat' , default=10   , help='runs per command')
+@click.option('--port'   , default=20990, help='stand-in worker port')
+@click.option('--command', 'commands', multiple=True, help='work command (default: all)')
+def main(repeat, port, commands):
+    from sys      import executable
+    from tempfile import TemporaryDirectory
+    with TemporaryDirectory() as root:
+        worker = start_worker(root, port)
+        try:
+            env = build_env(root, port)
+            click.echo(f'{"COMMAND":20} {"MIN":>10} {"MEDIAN":>10}')
+            base = measure([executable, '-c', 'pass'], repeat)
+            click.echo(f'{"(python)":20} {base[0] * 1e3:>8.1f}ms {base[1] * 1e3:>8.1f}ms')
+            for command in commands or COMMANDS:
+                best, middle = measure(
+                    [executable, '-m', 'robotworker.client', '--env', env] + command.split(), repeat)
+                click.echo(f'{command:20} {best * 1e3:>8.1f}ms {middle * 1e3:>8.1f}ms')
+        finally:
+            worker.terminate()
+            worker.wait()
+
+if __name__ == '__main__':
+    main()
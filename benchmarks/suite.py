@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Benchmark Suite}                                          ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+# starts local worker trees from generated configurations and measures them
+#   flat : root with <size> leaves
+#   deep : chain of <size> workers under the root
+#   wide : root with <size> workers of <size> leaves each
+# measures (latency percentiles in ms, throughput in calls/s)
+#   <tree>/run_keyword, <tree>/proxy/<depth>, <tree>/sequence, <tree>/broadcast,
+#   <tree>/throughput/*, format_data, load_conf and cli/* (cold start of 'work')
+# results go to json, compared with a baseline when given (regressions exit with 1)
+# usage: python -m benchmarks.suite [--tree flat] [--size 4] [--requests 200] [--mode threaded]
+#                                   [--output results.json] [--baseline benchmarks/baseline.json]
+#   store a baseline with: python -m benchmarks.suite --output benchmarks/baseline.json
+###################################################################################################
+from time import perf_counter as now
+import click
+
+TREES = ['flat', 'deep', 'wide']
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# statistics: samples (seconds) -> count, mean and percentiles (ms)
+# -------------------------------------------------------------------------------------------------
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+def summary(samples, spent=None):
+    ordered = sorted(samples)
+    out = dict(
+        count=len(ordered),
+        mean =sum(ordered) / len(ordered) * 1e3,
+        min  =ordered[0]  * 1e3,
+        p50  =percentile(ordered, 0.50) * 1e3,
+        p90  =percentile(ordered, 0.90) * 1e3,
+        p99  =percentile(ordered, 0.99) * 1e3,
+        max  =ordered[-1] * 1e3)
+    if spent:
+        out['rate'] = len(ordered) / spent
+    return out
+
+def measure(func, requests, warmup=5):
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(requests):
+        start = now()
+        func()
+        samples.append(now() - start)
+    return summary(samples)
+
+def throughput(func, requests, concurrency):
+    from concurrent.futures import ThreadPoolExecutor
+    def timed(_):
+        start = now()
+        func()
+        return now() - start
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(timed, range(concurrency)))
+        start   = now()
+        samples = list(pool.map(timed, range(requests)))
+        return summary(samples, now() - start)
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# trees: node -> children, paths of the nodes by depth
+# -------------------------------------------------------------------------------------------------
+def build_tree(kind, size):
+    if kind == 'flat':
+        return {'': [f'leaf{i}' for i in range(size)]}
+    if kind == 'deep':
+        chain = [''] + [f'n{i}' for i in range(1, size + 1)]
+        return {parent: [child] for parent, child in zip(chain, chain[1:])}
+    if kind == 'wide':
+        tree = {'': [f'm{i}' for i in range(size)]}
+        tree.update({f'm{i}': [f'l{j}' for j in range(size)] for i in range(size)})
+        return tree
+    raise ValueError(f'unknown tree: {kind}')
+
+def first_paths(tree):
+    # first node of each depth: [a, a.b, a.b.c, ...]
+    paths, node = [], ''
+    while tree.get(node):
+        node = tree[node][0]
+        paths.append(f'{paths[-1]}.{node}' if paths else node)
+    return paths
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# configurations: one per node, services start their children (parents wait for them)
+# -------------------------------------------------------------------------------------------------
+def write_confs(root, tree, mode, port):
+    from sys     import executable
+    from os.path import join
+    from yaml    import safe_dump
+    # nodes by path ('' is the root): (name, port)
+    nodes, pending = {'': ('', port)}, ['']
+    while pending:
+        path = pending.pop(0)
+        for child in tree.get(nodes[path][0], []):
+            nodes[f'{path}.{child}'.lstrip('.')] = (child, port + len(nodes))
+            pending.append(f'{path}.{child}'.lstrip('.'))
+    def conf(path):
+        return join(root, (path or 'root') + '.yml')
+    for path, (name, _) in nodes.items():
+        children = tree.get(name, [])
+        services = {}
+        for child in children:
+            key = f'{path}.{child}'.lstrip('.')
+            services[child] = dict(
+                cmd     =f'{executable} -m robotworker.worker',
+                host    ='127.0.0.1',
+                port    =nodes[key][1],
+                settings=dict(conf=conf(key), log=conf(key)[:-4] + '.log'))
+        data = dict(server=dict(mode=mode), context=dict(node=path or 'root'), services=services)
+        if children:
+            # children called concurrently
+            data['sequences'] = dict(bench=dict(sequence={
+                f'{child}.get_context': dict(after=[], args=[]) for child in children}))
+        with open(conf(path), 'w') as f:
+            safe_dump(data, f, sort_keys=False)
+    return conf(''), len(nodes)
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# root worker (own process group, the tree goes down with it)
+# -------------------------------------------------------------------------------------------------
+def start_tree(conf, port, timeout=120):
+    from subprocess import Popen, DEVNULL
+    from socket     import create_connection
+    from sys        import executable
+    from time       import sleep
+    from os.path    import dirname, abspath
+    from os         import environ
+    env    = dict(environ, PYTHONPATH=dirname(dirname(abspath(__file__))))
+    worker = Popen([executable, '-m', 'robotworker.worker',
+        '--conf', conf, '--log', conf[:-4] + '.log', '--port', str(port)],
+        stdout=DEVNULL, stderr=DEVNULL, env=env, start_new_session=True)
+    end = now() + timeout
+    while now() < end:
+        try:
+            create_connection(('127.0.0.1', port), timeout=1).close()
+            return worker
+        except OSError:
+            if worker.poll() is not None:
+                break
+            sleep(0.1)
+    stop_tree(worker)
+    raise RuntimeError(f'worker tree on port {port} did not start')
+
+def stop_tree(worker):
+    from os     import killpg
+    from signal import SIGTERM
+    try:
+        killpg(worker.pid, SIGTERM)
+    except (OSError, AttributeError):
+        worker.terminate()
+    worker.wait()
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# tree measures
+# -------------------------------------------------------------------------------------------------
+def bench_tree(kind, tree, uri, requests, concurrency):
+    from robotworker.client    import Client, transform
+    from robotworker.transport import PoolTransport
+    client  = Client(uri, PoolTransport(size=concurrency))
+    def call(path):
+        cmd, args = transform(path, [])
+        return lambda: client.run(cmd, *args)
+    results = {}
+    results[f'{kind}/run_keyword'] = measure(call('get_context'), requests)
+    for path in first_paths(tree):
+        results[f'{kind}/proxy/{path.count(".") + 1}'] = measure(call(f'{path}.get_context'), requests)
+    results[f'{kind}/sequence']  = measure(call('bench'), requests)
+    results[f'{kind}/broadcast'] = measure(
+        lambda: client.run('broadcast', '**', 'get_context'), max(requests // 10, 1))
+    results[f'{kind}/throughput/run_keyword'] = throughput(
+        call('get_context'), requests, concurrency)
+    results[f'{kind}/throughput/proxy'] = throughput(
+        call(f'{first_paths(tree)[-1]}.get_context'), requests, concurrency)
+    return results
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# document measures: format_data (compiled on each call and compiled once) and load_conf on a
+# large document
+# -------------------------------------------------------------------------------------------------
+def document(nodes):
+    # one string in ten has a placeholder
+    return dict(services={
+        f'server{i}': dict(
+            cmd ='robot_worker',
+            host='${host}' if i % 10 == 0 else '127.0.0.1',
+            port=20000 + i,
+            settings=dict(conf=f'conf{i}.yml', tags=[f'tag{j}' for j in range(4)]))
+        for i in range(nodes // 10)})
+
+def bench_documents(root, nodes, requests):
+    from os.path            import join
+    from yaml               import safe_dump
+    from robotworker.helper import format_data, compile_data, load_conf
+    data, path = document(nodes), join(root, 'document.yml')
+    with open(path, 'w') as f:
+        safe_dump(data, f)
+    compiled = compile_data(data)
+    return {
+        'format_data'         : measure(lambda: format_data(data, dict(host='10.0.0.1')), requests),
+        'format_data/compiled': measure(lambda: compiled.format(dict(host='10.0.0.1')), requests),
+        'load_conf'  : measure(lambda: load_conf(path), max(requests // 10, 1), warmup=1)}
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# cli cold start against a running root
+# -------------------------------------------------------------------------------------------------
+def bench_cli(root, port, requests):
+    from subprocess import run, DEVNULL
+    from sys        import executable
+    from os.path    import join
+    from .startup   import build_env
+    env, results = build_env(root, port), {}
+    for command in ['--help', '. get_context']:
+        args = [executable, '-m', 'robotworker.client', '--env', env] + command.split()
+        results[f'cli/{command}'] = measure(
+            lambda: run(args, stdout=DEVNULL, stderr=DEVNULL, check=True), requests, warmup=1)
+    return results
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# baseline comparison: latency (p50, p99) up or rate down more than tolerance
+# -------------------------------------------------------------------------------------------------
+def compare(results, baseline, tolerance):
+    rows, regressions = [], 0
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ('p50', 'p99', 'rate'):
+            if metric not in current or not previous.get(metric):
+                continue
+            change = current[metric] / previous[metric] - 1
+            worse  = -change if metric == 'rate' else change
+            failed = worse > tolerance
+            regressions += failed
+            rows.append((name, metric, previous[metric], current[metric], change, failed))
+    return rows, regressions
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# command
+# -------------------------------------------------------------------------------------------------
+@click.command()
+@click.option('--tree'       , 'trees', multiple=True, type=click.Choice(TREES), help='trees (default: all)')
+@click.option('--size'       , default=4    , help='tree size (leaves, depth, fan-out)')
+@click.option('--requests'   , default=200  , help='calls per measure')
+@click.option('--concurrency', default=8    , help='calls in flight (throughput)')
+@click.option('--mode'       , default='threaded', type=click.Choice(['threaded', 'async']))
+@click.option('--nodes'      , default=50000, help='document size (format_data, load_conf)')
+@click.option('--port'       , default=21500, help='first port of the trees')
+@click.option('--output'     , default=None , type=click.Path(dir_okay=False), help='results json')
+@click.option('--baseline'   , default=None , type=click.Path(exists=True, dir_okay=False))
+@click.option('--tolerance'  , default=0.2  , help='relative change reported as regression')
+def main(trees, size, requests, concurrency, mode, nodes, port, output, baseline, tolerance):
+    from json     import dump, load
+    from tempfile import TemporaryDirectory
+    from platform import python_version, platform
+    from datetime import datetime
+    from os       import cpu_count
+    results = {}
+    with TemporaryDirectory() as root:
+        for kind in trees or TREES:
+            tree        = build_tree(kind, size)
+            conf, count = write_confs(root, tree, mode, port)
+            click.echo(f'{kind}: {count} workers', err=True)
+            worker = start_tree(conf, port)
+            try:
+                results.update(bench_tree(
+                    kind, tree, f'http://127.0.0.1:{port}', requests, concurrency))
+                if kind == (trees or TREES)[0]:
+                    results.update(bench_cli(root, port, max(requests // 20, 3)))
+            finally:
+                stop_tree(worker)
+            port += count
+        results.update(bench_documents(root, nodes, requests))
+    click.echo(f'{"MEASURE":32}{"COUNT":>7}{"P50":>10}{"P90":>10}{"P99":>10}{"RATE":>10}')
+    for name, stats in results.items():
+        rate = f'{stats["rate"]:>10.0f}' if 'rate' in stats else f'{"":>10}'
+        click.echo(f'{name:32}{stats["count"]:>7}{stats["p50"]:>8.2f}ms'
+                   f'{stats["p90"]:>8.2f}ms{stats["p99"]:>8.2f}ms{rate}')
+    if output:
+        with open(output, 'w') as f:
+            dump(dict(
+                meta=dict(
+                    date=datetime.now().isoformat(timespec='seconds'),
+                    python=python_version(), platform=platform(), cpus=cpu_count(),
+                    size=size, requests=requests, concurrency=concurrency, mode=mode,
+                    nodes=nodes),
+                results=results), f, indent=2)
+    if baseline:
+        with open(baseline) as f:
+            stored = load(f)
+        rows, regressions = compare(results, stored['results'], tolerance)
+        options = dict(size=size, requests=requests, concurrency=concurrency, mode=mode, nodes=nodes)
+        changed = [key for key, value in options.items() if stored.get('meta', {}).get(key) != value]
+        if changed:
+            click.echo(f'\nbaseline taken with other {", ".join(changed)}', err=True)
+        click.echo(f'\n{"MEASURE":32}{"METRIC":>7}{"BASE":>12}{"NOW":>12}{"CHANGE":>9}')
+        for name, metric, before, after, change, failed in rows:
+            click.echo(f'{name:32}{metric:>7}{before:>12.2f}{after:>12.2f}{change:>+8.0%}'
+                       + ('  REGRESSION' if failed else ''))
+        if regressions:
+            raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
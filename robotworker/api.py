@@ -16,22 +16,62 @@
 # ---------------------------------------------------------
 # functions
 from logging  import getLogger  as logger
-# objects
-from string   import Template
 
 # ---------------------------------------------------------
 # internal
 # ---------------------------------------------------------
 # objects
-from .service import Service
+from .service   import Service
+from .transport import Unreachable
 
 # #################################################################################################
 # -------------------------------------------------------------------------------------------------
 # helpers
 # -------------------------------------------------------------------------------------------------
 # #################################################################################################
-class Pattern(Template): 
-    idpattern = r'(?a:[_a-z][\.\-_a-z0-9]*)'
+# batch item: [keyword, args, kwargs], keyword may target a service (server.keyword)
+class BatchItem(object):
+    def __init__(self, name, args=[], kwargs={}):
+        self.path   = name.split('.')
+        self.args   = list(args)
+        self.kwargs = dict(kwargs)
+
+    # target service
+    def server(self):
+        return self.path[0] if len(self.path) > 1 else ''
+
+    # item for the target service
+    def forward(self):
+        return ['.'.join(self.path[1:]), self.args, self.kwargs]
+
+    # run local keyword, capture output
+    def run(self, find):
+        from .output import capture
+        from .server import resolve
+        with capture() as output:
+            try:
+                value  = resolve(find(self.path[0])(*self.args, **self.kwargs))
+                result = dict(status='PASS')
+                if value is not None:
+                    result['return'] = value
+            except Exception as ex:
+                result = dict(status='FAIL', error=str(ex))
+        if output.value():
+            result['output'] = output.value()
+        return result
+
+# broadcast pattern step: service name against pattern segments (a.*.c, '**' spans levels)
+#   @return: (name matches, segments to forward to the service)
+def match_service(segments, name):
+    from fnmatch import fnmatchcase
+    if not segments:
+        return False, []
+    if segments[0] == '**':
+        hit, rests = match_service(segments[1:], name)
+        return hit or len(segments) == 1, rests + [segments]
+    if fnmatchcase(name, segments[0]):
+        return len(segments) == 1, [segments[1:]] if len(segments) > 1 else []
+    return False, []
 
 ###################################################################################################
 # -------------------------------------------------------------------------------------------------
@@ -51,15 +91,42 @@ class Api(object):
     #  @ext : extensions 
     # -----------------------------------------------------------------------------------
     def __init__(self, conf={}, ext=[]):
+        from uuid import uuid4
         # initialize logger
         self._log        = logger()
+        # worker identity (checked before direct routes)
+        self._identity   = uuid4().hex
+        # calls sent to services at the same time
+        self._fanout     = max(1, int(conf.get('fanout', 16)))
         # load context
         self._context    = self._load_context(conf.get('context', {}))
         # load services
         self._services   = self._load_services(conf.get('services', {}))
+        # load supervisor
+        self._supervisor = self._load_supervisor(conf.get('supervisor', {}))
+        # output streams
+        self._streams    = self._load_streams(conf.get('streams', {}))
+        # background jobs
+        self._jobs       = self._load_jobs(conf.get('jobs', {}))
+        # file store
+        self._files      = self._load_files(conf.get('files', {}))
+        # routes to the descendants
+        self._routes     = self._load_routes(conf.get('routes', {}))
+        # traced calls
+        self._tracer     = self._load_tracing(conf.get('tracing', {}))
+        # async engine: proxy through async transports
+        if (conf.get('server') or {}).get('mode') == 'async':
+            self.proxy   = self._proxy_async
         # load extensions
         self._extensions = self._load_extensions(conf.get('extensions', {}),  ext)
-        # load sequences
+        # result cache (before sequences bind their keywords)
+        self._cache      = self._load_cache(conf.get('cache', {}))
+        # metrics (measures keywords and cached results)
+        self._metrics    = self._load_metrics(conf.get('metrics', {}))
+        # profiler (idle until a profile starts)
+        self._profiler   = self._load_profiler(conf.get('profiler', {}))
+        # load sequences (concurrent steps on a shared pool)
+        self._steps      = self._load_steps()
         self._sequences  = self._load_sequences(conf.get('sequences', {}))
 
     #####################################################################################
@@ -67,16 +134,41 @@ class Api(object):
     #  context manager
     # -----------------------------------------------------------------------------------
     def __enter__(self):
-        pass
+        self._supervisor.start()
+        self._metrics.start()
     def __exit__(self, err_type, err_value, err_trace):
-        pass
+        self._supervisor.stop()
+        self._jobs.close()
+        self._metrics.stop()
+        self._steps.shutdown(wait=False)
                 
     #####################################################################################
     # -----------------------------------------------------------------------------------
     #   proxy services
     # -----------------------------------------------------------------------------------
     def proxy(self, server, func, *args, **kwargs):
-        report = self._services[server].execute(func, *args, **kwargs)
+        from .output import streaming
+        if streaming():
+            return self._proxy_stream(server, func, *args, **kwargs)
+        report = self._execute(server, func, *args, **kwargs)
+        # check status
+        if report.pop('status', 'FAIL')  == 'FAIL':
+            raise RuntimeError(report.get('error', 'unknown'))
+        # print stdout
+        if 'output' in report:
+            print(report['output'])
+        # return data
+        return report.get('return', None)
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   proxy services (async engine)
+    # -----------------------------------------------------------------------------------
+    async def _proxy_async(self, server, func, *args, **kwargs):
+        from .output import streaming
+        if streaming():
+            return await self._proxy_stream_async(server, func, *args, **kwargs)
+        report = await self._execute_async(server, func, *args, **kwargs)
         # check status
         if report.pop('status', 'FAIL')  == 'FAIL':
             raise RuntimeError(report.get('error', 'unknown'))
@@ -86,6 +178,303 @@ class Api(object):
         # return data
         return report.get('return', None)
 
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   execute on a service, nested proxy chains go straight to the last service when
+    #   its address is known (relayed hop by hop when it can not be reached from here,
+    #   a call that reached the address is not sent again)
+    # -----------------------------------------------------------------------------------
+    def _execute(self, server, func, *args, **kwargs):
+        route = self._routes.route(server, func, args) if func == 'proxy' else None
+        if route:
+            uri, name, params = route
+            try:
+                return self._routes.execute(uri, name, *params, **kwargs)
+            except Unreachable:
+                self._routes.block(uri)
+        return self._services[server].execute(func, *args, **kwargs)
+
+    async def _execute_async(self, server, func, *args, **kwargs):
+        from asyncio import to_thread
+        # the table may be learned (blocking calls)
+        route = await to_thread(self._routes.route, server, func, args) if func == 'proxy' else None
+        if route:
+            uri, name, params = route
+            try:
+                return await self._routes.execute_async(uri, name, *params, **kwargs)
+            except Unreachable:
+                self._routes.block(uri)
+        return await self._services[server].execute_async(func, *args, **kwargs)
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   proxy services (streaming): run the keyword as a stream on the service and
+    #   forward its chunks to the current stream as they arrive
+    # -----------------------------------------------------------------------------------
+    def _proxy_stream(self, server, func, *args, **kwargs):
+        from sys import stdout
+        service = self._services[server]
+        execute = lambda *params, **kw: self._unwrap(service.execute(*params, **kw))
+        sid     = execute('stream', func, *args, **kwargs)
+        chunk   = dict(cursor=0, done=False)
+        while not chunk['done']:
+            chunk = execute('read_output', sid, chunk['cursor'])
+            stdout.write(chunk['data'])
+        return self._unwrap(chunk)
+
+    async def _proxy_stream_async(self, server, func, *args, **kwargs):
+        from sys import stdout
+        service = self._services[server]
+        execute = service.execute_async
+        sid     = self._unwrap(await execute('stream', func, *args, **kwargs))
+        chunk   = dict(cursor=0, done=False)
+        while not chunk['done']:
+            chunk = self._unwrap(await execute('read_output', sid, chunk['cursor']))
+            stdout.write(chunk['data'])
+        return self._unwrap(chunk)
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   stream: run a keyword in background, its output is read with read_output
+    #   @return: stream id
+    # -----------------------------------------------------------------------------------
+    def stream(self, func, *args, **kwargs):
+        from contextvars import copy_context
+        from .output     import capture, StreamCapture
+        from .server     import resolve
+        keyword     = getattr(self, func)
+        sid, stream = self._streams.open()
+        def run():
+            with capture(StreamCapture(stream)):
+                try:
+                    value = resolve(keyword(*args, **kwargs))
+                except BaseException as ex:
+                    stream.close(status='FAIL', error=str(ex))
+                    return
+            stream.close(status='PASS', **({} if value is None else {'return': value}))
+        self._streams.submit(copy_context().run, run)
+        return sid
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   read output: chunk after cursor (data, cursor, done), waits up to 'wait' seconds
+    #   the last chunk carries the call report (status, return, error)
+    # -----------------------------------------------------------------------------------
+    def read_output(self, sid, cursor=0, wait=1):
+        chunk = self._streams.get(sid).read(int(cursor), float(wait))
+        if chunk['done']:
+            self._streams.discard(sid)
+        return chunk
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   submit job: run a keyword in background
+    #   proxied keywords are submitted on the target service (job id: <server>/<id>),
+    #   no connection or thread is held on the way
+    #   @return: job id
+    # -----------------------------------------------------------------------------------
+    def submit_job(self, func, *args, **kwargs):
+        from .server import resolve
+        if func == 'proxy':
+            server, func, *args = args
+            return f'{server}/' + resolve(self.proxy(server, 'submit_job', func, *args, **kwargs))
+        # unknown keywords fail on submit
+        keyword = getattr(self, func)
+        item    = BatchItem(func, args, kwargs)
+        return self._jobs.submit(func, lambda: item.run(lambda name: keyword))
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   job status: id, keyword, state (queued, running, passed, failed, cancelled) and
+    #   times (submitted, started, finished)
+    # -----------------------------------------------------------------------------------
+    def get_job_status(self, jid):
+        return self._job_call(jid, 'get_job_status', lambda job: self._jobs.status(job))
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   wait job: up to timeout seconds, returns its status
+    # -----------------------------------------------------------------------------------
+    def wait_job(self, jid, timeout=None):
+        timeout = () if timeout is None else (float(timeout),)
+        return self._job_call(jid, 'wait_job', lambda job: self._jobs.wait(job, *timeout), *timeout)
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   job result: report (status, return, error, output) of a finished job
+    # -----------------------------------------------------------------------------------
+    def get_job_result(self, jid):
+        return self._job_call(jid, 'get_job_result', lambda job: self._jobs.result(job))
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   cancel job: queued jobs never run, running jobs are flagged
+    # -----------------------------------------------------------------------------------
+    def cancel_job(self, jid):
+        return self._job_call(jid, 'cancel_job', lambda job: self._jobs.cancel(job))
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   get jobs (local)
+    # -----------------------------------------------------------------------------------
+    def get_jobs(self):
+        return self._jobs.statuses()
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   push file: send a file to services, chunked and resumable
+    #   @source : local path or blob:<digest> (file store)
+    #   @servers: service paths, comma separated (a.b,a.c), each hop receives it once
+    #   @target : path to export the file to on the last hops
+    # -----------------------------------------------------------------------------------
+    def push_file(self, source, servers, target=''):
+        from .files  import hash_file, send_blob
+        from .server import resolve
+        if source.startswith('blob:'):
+            digest, path = source[5:], self._files.path(source[5:])
+        else:
+            digest, path = hash_file(source, self._files.chunk), source
+        # group by first hop
+        hops = {}
+        for server in servers.split(','):
+            hop, _, rest = server.strip().partition('.')
+            hops.setdefault(hop, []).append(rest)
+        report = dict(digest=digest, sent={}, target={})
+        for hop, rests in hops.items():
+            remote = lambda name, *args, hop=hop: resolve(self.proxy(hop, name, *args))
+            report['sent'][hop] = str(send_blob(path, digest, remote, self._files.chunk))
+            inner = [rest for rest in rests if rest]
+            if inner:
+                result = remote('push_file', f'blob:{digest}', ','.join(inner), target)
+                report['sent'  ].update({f'{hop}.{k}': v for k, v in result['sent'  ].items()})
+                report['target'].update({f'{hop}.{k}': v for k, v in result['target'].items()})
+            if target and '' in rests:
+                report['target'][hop] = remote('blob_export', digest, target)
+        return report
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   pull file: get a file from a service, chunked and resumable
+    #   @server: service path (a.b), hops on the way keep a copy in their store
+    #   @source: path on the service
+    #   @target: local path to export the file to
+    # -----------------------------------------------------------------------------------
+    def pull_file(self, server, source, target=''):
+        from .files  import receive_blob
+        from .server import resolve
+        hop, _, rest = server.partition('.')
+        remote = lambda name, *args: resolve(self.proxy(hop, name, *args))
+        if rest:
+            blob = remote('pull_file', rest, source)
+        else:
+            blob = remote('blob_add', source)
+        received = receive_blob(self._files, blob['digest'], blob['size'], remote)
+        report   = dict(digest=blob['digest'], size=blob['size'], received=str(received))
+        if target:
+            report['target'] = self._files.export(blob['digest'], target)
+        return report
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   file store (blob transfer between workers, see files)
+    # -----------------------------------------------------------------------------------
+    def blob_status(self, digest):
+        return self._files.status(digest)
+
+    def blob_write(self, digest, offset, data, crc):
+        return self._files.write(digest, offset, data, crc)
+
+    def blob_commit(self, digest):
+        return self._files.commit(digest)
+
+    def blob_read(self, digest, offset, size=None):
+        return self._files.read(digest, offset, size)
+
+    def blob_add(self, path):
+        return self._files.add(path)
+
+    def blob_export(self, digest, target):
+        return self._files.export(digest, target)
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   batch: run [keyword, args, kwargs] items in one request
+    #   @mode: stop (on first failure) | continue
+    # -----------------------------------------------------------------------------------
+    def batch(self, calls, mode='stop'):
+        from itertools import groupby
+        from .server   import resolve
+        report = []
+        halted = lambda: mode == 'stop' and report and report[-1]['status'] in ('FAIL', 'SKIP')
+        # group consecutive items by target service ('' for local keywords)
+        for server, group in groupby([BatchItem(*call) for call in calls], BatchItem.server):
+            group = list(group)
+            # local keywords
+            if not server:
+                for item in group:
+                    report.append(
+                        dict(status='SKIP') if halted() else item.run(lambda n: getattr(self, n)))
+                continue
+            # forward sub batch to the service in one hop
+            if halted():
+                report += [dict(status='SKIP') for _ in group]
+                continue
+            try:
+                report += resolve(self.proxy(
+                    server, 'batch', [item.forward() for item in group], mode))
+            except Exception as ex:
+                report += [dict(status='FAIL', error=str(ex)) for _ in group]
+        return report
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   broadcast: run a keyword on the services matching patterns, sub-trees concurrently
+    #   @pattern: service path patterns, comma separated (*, a.*, **.db, ...)
+    #   @return : path -> {status, return, output, error, latency}
+    # -----------------------------------------------------------------------------------
+    def broadcast(self, pattern, func, *args, **kwargs):
+        from concurrent.futures import ThreadPoolExecutor
+        from contextvars        import copy_context
+        from time               import monotonic as now
+        def call(name, keyword, *params):
+            start = now()
+            try:
+                report = self._services[name].execute(keyword, *params, **kwargs)
+            except Exception as ex:
+                report = dict(status='FAIL', error=str(ex))
+            return report, now() - start
+        # targets: services to run on, sub-patterns to forward
+        hits, forward = [], {}
+        for segments in [p.strip().split('.') for p in pattern.split(',') if p.strip()]:
+            for name in self._services:
+                hit, rests = match_service(segments, name)
+                if hit and name not in hits:
+                    hits.append(name)
+                for rest in rests:
+                    forward.setdefault(name, set()).add('.'.join(rest))
+        tasks = [(name, False, (func,) + args) for name in hits] + [
+            (name, True, ('broadcast', ','.join(sorted(rests)), func) + args)
+            for name, rests in forward.items()]
+        if not tasks:
+            return {}
+        with ThreadPoolExecutor(min(len(tasks), self._fanout)) as pool:
+            results = list(pool.map(
+                lambda task: copy_context().run(call, task[0], *task[2]), tasks))
+        # aggregate (nodes first, then sub-trees)
+        report = {}
+        for (name, subtree, _), (result, latency) in zip(tasks, results):
+            if not subtree:
+                report[name] = dict(latency=latency, **{
+                    k: v for k, v in result.items() if k in ('status', 'return', 'output', 'error')})
+            elif result.get('status') == 'PASS':
+                for path, entry in (result.get('return') or {}).items():
+                    report[f'{name}.{path}'] = entry
+            elif name in report:
+                report[name]['subtree'] = result.get('error', 'unknown')
+            else:
+                report[name] = dict(status='FAIL', error=result.get('error', 'unknown'), latency=latency)
+        return report
+
     #####################################################################################
     # -----------------------------------------------------------------------------------
     #   get services
@@ -93,6 +482,129 @@ class Api(object):
     def get_services(self):
         return {name:service.address() for name, service in self._services.items()}
 
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   get routes: addresses and identities of all descendants (a, a.b, a.b.c, ...)
+    # -----------------------------------------------------------------------------------
+    def get_routes(self):
+        return self._routes.table()
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   get identity (of this worker process)
+    # -----------------------------------------------------------------------------------
+    def get_identity(self):
+        return self._identity
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   get startup
+    # -----------------------------------------------------------------------------------
+    def get_startup(self):
+        return {name:service.startup() for name, service in self._services.items()}
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   get supervision
+    # -----------------------------------------------------------------------------------
+    def get_supervision(self):
+        return self._supervisor.report()
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   restart service
+    # -----------------------------------------------------------------------------------
+    def restart_service(self, name):
+        return self._supervisor.restart(name)
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   get statistics
+    # -----------------------------------------------------------------------------------
+    def get_statistics(self):
+        return {name:service.statistics() for name, service in self._services.items()}
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   get library: all keywords described at once (extensions and sequences included)
+    #   @version: version the caller has, only the version returns when it is current
+    # -----------------------------------------------------------------------------------
+    def get_library(self, version=''):
+        from .server import keywords, library
+        return library(keywords(self), version)
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   invalidate cached results
+    #   @name: keyword path (all keywords when empty)
+    #   @args: call arguments (all results of the keyword when empty)
+    # -----------------------------------------------------------------------------------
+    def invalidate(self, name='', *args, **kwargs):
+        return self._cache.invalidate(name, args, kwargs)
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   get cache
+    # -----------------------------------------------------------------------------------
+    def get_cache(self):
+        return self._cache.statistics()
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   get metrics: keyword -> target ('' local, a.b proxy) -> calls, errors, inflight,
+    #   latency (mean, p50, p90, p99 in seconds)
+    #   @text: prometheus text format
+    # -----------------------------------------------------------------------------------
+    def get_metrics(self, text=False):
+        if str(text).lower() in ('true', 'yes', '1'):
+            return self._metrics.prometheus()
+        return self._metrics.report()
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   start profile: keyword calls are profiled (cProfile, sampled stacks and, with
+    #   memory, tracemalloc differences) until n calls, n seconds or stop_profile
+    #   @name: keyword (all keywords when empty)
+    # -----------------------------------------------------------------------------------
+    def start_profile(self, name='', calls=0, seconds=0, memory=False):
+        return self._profiler.start(
+            name, int(calls), float(seconds), str(memory).lower() in ('true', 'yes', '1'))
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   stop profile
+    # -----------------------------------------------------------------------------------
+    def stop_profile(self):
+        return self._profiler.stop()
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   get profile of the last session
+    #   @format: pstats, collapsed, memory or raw (pstats file content)
+    # -----------------------------------------------------------------------------------
+    def get_profile(self, format='pstats', limit=30, sort='cumulative'):
+        return self._profiler.report(format, limit, sort)
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   get spans: spans of a trace recorded here and on all descendants (zipkin v2,
+    #   timestamp and duration in microseconds as strings)
+    # -----------------------------------------------------------------------------------
+    def get_spans(self, trace):
+        from concurrent.futures import ThreadPoolExecutor
+        def inner(service):
+            try:
+                return self._unwrap(service.execute('get_spans', trace)) or []
+            except Exception:
+                return []
+        spans = [dict(span, timestamp=str(span['timestamp']), duration=str(span['duration']))
+                 for span in self._tracer.spans(trace)]
+        if self._services:
+            with ThreadPoolExecutor(min(len(self._services), self._fanout)) as pool:
+                for found in pool.map(inner, self._services.values()):
+                    spans += found
+        return spans
+
     #####################################################################################
     # -----------------------------------------------------------------------------------
     #   get extensions
@@ -100,6 +612,13 @@ class Api(object):
     def get_extensions(self):
         return self._extensions.copy()
 
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   explain sequence
+    # -----------------------------------------------------------------------------------
+    def explain(self, name):
+        return self._sequences[name].explain()
+
     #####################################################################################
     # -----------------------------------------------------------------------------------
     #   get context
@@ -131,15 +650,120 @@ class Api(object):
     #   load services
     # -----------------------------------------------------------------------------------
     def _load_services(self, conf):
+        from concurrent.futures import ThreadPoolExecutor
         services = {}
         for name, params in conf.items():
             services[name] = Service(
                 params['cmd'],
                 params['host'],
                 params['port'],
-                params.get('settings', {}))
+                params.get('settings', {}),
+                params.get('pool', {}),
+                params.get('timeout', 30))
+        if not services:
+            return services
+        # start all services, then wait until all of them are ready
+        with ThreadPoolExecutor(min(len(services), self._fanout)) as pool:
+            list(pool.map(Service.start, services.values()))
+            ready = dict(zip(services, pool.map(Service.wait, services.values())))
+        for name, service in services.items():
+            report = service.startup()
+            if ready[name]:
+                self._log.info(f'service {name}: {report}')
+            else:
+                self._log.error(f'service {name}: {report}')
         return services
     
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   load streams
+    # -----------------------------------------------------------------------------------
+    def _load_streams(self, conf):
+        from .output import StreamTable
+        return StreamTable(**conf)
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   load jobs
+    # -----------------------------------------------------------------------------------
+    def _load_jobs(self, conf):
+        from .jobs import JobTable
+        return JobTable(**conf)
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   load files
+    # -----------------------------------------------------------------------------------
+    def _load_files(self, conf):
+        from .files import BlobStore
+        return BlobStore(**conf)
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   load cache: keywords with a policy are replaced by cached ones (proxy calls
+    #   are cached by path, server.keyword)
+    # -----------------------------------------------------------------------------------
+    def _load_cache(self, conf):
+        from .cache import ResultCache
+        cache = ResultCache(conf)
+        for name in conf:
+            if '.' not in name and hasattr(self, name):
+                setattr(self, name, cache.wrap(name, getattr(self, name)))
+        self.proxy = cache.wrap_proxy(self.proxy)
+        return cache
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   load metrics: all keywords are replaced by measured ones (proxy calls by target)
+    # -----------------------------------------------------------------------------------
+    def _load_metrics(self, conf):
+        from .metrics import Metrics
+        from .server  import keywords
+        metrics = Metrics(**conf)
+        for name, keyword in keywords(self).items():
+            if name == 'proxy':
+                setattr(self, name, metrics.wrap_proxy(keyword))
+                continue
+            setattr(self, name, metrics.wrap(name, keyword))
+        return metrics
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   load profiler: all keywords are replaced by profiled ones (but its own)
+    # -----------------------------------------------------------------------------------
+    def _load_profiler(self, conf):
+        from .profiler import Profiler
+        from .server   import keywords
+        profiler = Profiler(**conf)
+        for name, keyword in keywords(self).items():
+            if name not in ('start_profile', 'stop_profile', 'get_profile'):
+                setattr(self, name, profiler.wrap(name, keyword))
+        return profiler
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   load tracing
+    # -----------------------------------------------------------------------------------
+    def _load_tracing(self, conf):
+        from . import tracing
+        return tracing.configure(**conf) if conf else tracing.TRACER
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   load routes
+    # -----------------------------------------------------------------------------------
+    def _load_routes(self, conf):
+        from .service import Routes
+        return Routes(self._services, fanout=self._fanout, **conf)
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    #   load supervisor
+    # -----------------------------------------------------------------------------------
+    def _load_supervisor(self, conf):
+        from .supervisor import Supervisor
+        return Supervisor(self._services, **conf)
+
     #####################################################################################
     # -----------------------------------------------------------------------------------
     # load extension
@@ -173,48 +797,65 @@ class Api(object):
             setattr(Api, func.__name__, func)
         return[func.__name__ for func in register['func']]
     
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    # load steps pool (sequence steps running at the same time, threads started on use)
+    # -----------------------------------------------------------------------------------
+    def _load_steps(self):
+        from concurrent.futures import ThreadPoolExecutor
+        return ThreadPoolExecutor(self._fanout, 'robotworker-step')
+
     #####################################################################################
     # -----------------------------------------------------------------------------------
     # load sequencies
+    #   each sequence is compiled once into a plan, step keywords are found when they run
+    #   (unknown ones are reported here and fail only their sequence)
     # -----------------------------------------------------------------------------------
     def _load_sequences(self, config):
-        from functools import partial
-        sequences = {} 
+        from .plan import build_plan
+        sequences = {}
+        keyword   = lambda name: lambda *args, **kargs: self._run_sequence(name, args, kargs)
         for name, params in config.items():
-            sequence = partial(self._run_sequence, params)
-            sequences[name] = sequence
-            setattr(self, name, lambda *args, **kargs: sequence(args, kargs))
+            sequences[name] = build_plan(name, params, lambda key: getattr(self, key))
+            setattr(self, name, self._profiler.wrap(name,
+                self._metrics.wrap(name, self._cache.wrap(name, keyword(name)))))
+        for name, plan in sequences.items():
+            for step in plan.steps:
+                if not hasattr(self, step.target.split()[0]):
+                    self._log.warning(f'sequence {name}, step {step.name}: unknown keyword')
         return sequences
 
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    # job call: local job or forwarded to the service of its id (<server>/<id>)
+    # -----------------------------------------------------------------------------------
+    def _job_call(self, jid, name, local, *args):
+        from .server import resolve
+        if '/' not in jid:
+            return local(jid)
+        server, job = jid.split('/', 1)
+        result = resolve(self.proxy(server, name, job, *args))
+        if isinstance(result, dict) and 'id' in result:
+            result['id'] = jid
+        return result
+
+    #####################################################################################
+    # -----------------------------------------------------------------------------------
+    # unwrap a report (status, return, error)
+    # -----------------------------------------------------------------------------------
+    @staticmethod
+    def _unwrap(report):
+        if report.get('status', 'FAIL') == 'FAIL':
+            raise RuntimeError(report.get('error', 'unknown'))
+        return report.get('return', None)
+
     #####################################################################################
     # -----------------------------------------------------------------------------------
     # run sequence
     # -----------------------------------------------------------------------------------
-    def _run_sequence(self, config, args=[], kargs={}):
-        # utilities
-        template = lambda o, c   : Pattern(o).substitute(c).split()
-        execute  = lambda p, a, k: getattr(self, p[0])(*(p[1:] + a), **k)
-        build    = lambda p      : [x for c in p[:-1] for x in ['proxy', c]] + p[-1:]
-        # get properties
-        context  = config.get('context', {})
-        sequency = config.get('sequence' , {})
-        # build context
-        context = self.get_context()
-        context.update(context)
-        context.update(zip(context, args))
-        context.update(kargs)
-        # run sequency
-        report = {}
-        for cmd, opt in sequency.items():
-            # get arguments from options
-            args, kargs = {
-                str  : lambda o, c : (template(o, c), {}),
-                list : lambda o, c : (o, {}),
-                dict : lambda o, c : ([], o)
-            }[type(opt)](opt, context)
-            # execute command
-            report[cmd] = execute(build(cmd.split('.')), args, kargs)
-        return report
+    def _run_sequence(self, name, args=[], kargs={}):
+        from .server import resolve
+        return self._sequences[name](args, kargs, self._context, resolve, self._steps)
 
 ###################################################################################################
 # -------------------------------------------------------------------------------------------------
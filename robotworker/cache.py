@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Cache}                                                    ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# imports
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from collections        import OrderedDict
+from concurrent.futures import Future
+from functools          import wraps
+from inspect            import iscoroutinefunction
+from threading          import Lock
+from time               import monotonic             as now
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Policy
+#   results of one keyword: kept ttl seconds, up to size entries (least recently used go
+#   first), identical concurrent calls share one execution
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Policy(object):
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   constructor
+    #   @ttl : seconds a result is kept
+    #   @args: arguments are part of the key (false: one result for any arguments)
+    #   @size: max results kept
+    # -----------------------------------------------------------------------------------
+    def __init__(self, ttl=60, args=True, size=256):
+        self.__ttl     = float(ttl)
+        self.__args    = bool(args)
+        self.__size    = int(size)
+        self.__lock    = Lock()
+        self.__entries = OrderedDict()
+        self.__flights = {}
+        self.__stats   = dict(hits=0, misses=0, shared=0, evictions=0)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   call key
+    # -----------------------------------------------------------------------------------
+    def key(self, args, kwargs):
+        return repr((args, sorted(kwargs.items()))) if self.__args else ''
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   cached call
+    #   @run: () -> value, runs only when the key is not cached nor running
+    # -----------------------------------------------------------------------------------
+    def get(self, key, run):
+        leader, flight = self.__join(key, Future)
+        if flight is None:
+            return leader
+        if not leader:
+            return flight.result()
+        try:
+            value = run()
+        except BaseException as ex:
+            self.__land(key)
+            flight.set_exception(ex)
+            raise
+        self.__land(key, value)
+        flight.set_result(value)
+        return value
+
+    async def get_async(self, key, run):
+        from asyncio import get_running_loop, shield
+        leader, flight = self.__join(key, get_running_loop().create_future)
+        if flight is None:
+            return leader
+        if not leader:
+            return await shield(flight)
+        try:
+            value = await run()
+        except BaseException as ex:
+            self.__land(key)
+            flight.set_exception(ex)
+            # nobody may wait for it
+            flight.exception()
+            raise
+        self.__land(key, value)
+        flight.set_result(value)
+        return value
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   drop results (all when key is None), returns the number dropped
+    # -----------------------------------------------------------------------------------
+    def invalidate(self, key=None):
+        with self.__lock:
+            if key is None:
+                count = len(self.__entries)
+                self.__entries.clear()
+                return count
+            return 1 if self.__entries.pop(key, None) else 0
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   statistics
+    # -----------------------------------------------------------------------------------
+    def statistics(self):
+        with self.__lock:
+            return dict(self.__stats, size=len(self.__entries), ttl=self.__ttl)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   helpers
+    #   join: (value, None) on hits, (leader, flight) otherwise
+    # -----------------------------------------------------------------------------------
+    def __join(self, key, build):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry and entry[1] > now():
+                self.__entries.move_to_end(key)
+                self.__stats['hits'] += 1
+                return entry[0], None
+            if key in self.__flights:
+                self.__stats['shared'] += 1
+                return False, self.__flights[key]
+            self.__stats['misses'] += 1
+            self.__flights[key] = build()
+            return True, self.__flights[key]
+
+    def __land(self, key, *value):
+        with self.__lock:
+            self.__flights.pop(key, None)
+            if not value:
+                return
+            self.__entries[key] = (value[0], now() + self.__ttl)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__size:
+                self.__entries.popitem(last=False)
+                self.__stats['evictions'] += 1
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Result Cache
+#   policies by keyword path (keyword or server.keyword for proxy calls)
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class ResultCache(object):
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   constructor
+    #   @conf: keyword path -> policy settings (ttl, args, size)
+    # -----------------------------------------------------------------------------------
+    def __init__(self, conf={}):
+        self.__policies = {name: Policy(**(opts or {})) for name, opts in conf.items()}
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   cached keyword (the keyword itself when it has no policy)
+    # -----------------------------------------------------------------------------------
+    def wrap(self, name, keyword):
+        policy = self.__policies.get(name)
+        if policy is None:
+            return keyword
+        if iscoroutinefunction(keyword):
+            @wraps(keyword)
+            async def cached(*args, **kwargs):
+                return await policy.get_async(
+                    policy.key(args, kwargs), lambda: keyword(*args, **kwargs))
+            return cached
+        @wraps(keyword)
+        def cached(*args, **kwargs):
+            return policy.get(policy.key(args, kwargs), lambda: keyword(*args, **kwargs))
+        return cached
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   cached proxy: policies of the called path (server.keyword, a.b.keyword, ...)
+    # -----------------------------------------------------------------------------------
+    def wrap_proxy(self, proxy):
+        if not any('.' in name for name in self.__policies):
+            return proxy
+        def find(server, func, args):
+            path = [server]
+            while func == 'proxy' and len(args) >= 2:
+                path.append(args[0])
+                func, args = args[1], args[2:]
+            return self.__policies.get('.'.join(path + [func]))
+        if iscoroutinefunction(proxy):
+            @wraps(proxy)
+            async def cached(server, func, *args, **kwargs):
+                policy = find(server, func, args)
+                if policy is None:
+                    return await proxy(server, func, *args, **kwargs)
+                return await policy.get_async(
+                    policy.key((server, func) + args, kwargs),
+                    lambda: proxy(server, func, *args, **kwargs))
+            return cached
+        @wraps(proxy)
+        def cached(server, func, *args, **kwargs):
+            policy = find(server, func, args)
+            if policy is None:
+                return proxy(server, func, *args, **kwargs)
+            return policy.get(
+                policy.key((server, func) + args, kwargs),
+                lambda: proxy(server, func, *args, **kwargs))
+        return cached
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   drop results
+    #   @name: keyword path (all keywords when empty)
+    #   @args: call arguments (all results of the keyword when empty)
+    # -----------------------------------------------------------------------------------
+    def invalidate(self, name='', args=(), kwargs={}):
+        if not name:
+            return sum(policy.invalidate() for policy in self.__policies.values())
+        if name not in self.__policies:
+            raise KeyError(f'no cache policy for {name}')
+        policy = self.__policies[name]
+        if not args and not kwargs:
+            return policy.invalidate()
+        if '.' in name:
+            # proxy key: arguments as called (a, proxy, b, keyword, *args)
+            server, *path = name.split('.')
+            args = (server,) + tuple(x for p in path[:-1] for x in ('proxy', p)) + \
+                (path[-1],) + tuple(args)
+        return policy.invalidate(policy.key(tuple(args), kwargs))
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   statistics
+    # -----------------------------------------------------------------------------------
+    def statistics(self):
+        return {name: policy.statistics() for name, policy in self.__policies.items()}
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# End
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
@@ -10,10 +10,8 @@
 # imports
 # -------------------------------------------------------------------------------------------------
 ###################################################################################################
-# external
-import pickle        as pk
-import xmlrpc.client as xc
-import functools     as ft
+# internal (commands import what they use when they run)
+from .transport import Proxy, PoolTransport
 
 ###################################################################################################
 # -------------------------------------------------------------------------------------------------
@@ -27,7 +25,7 @@ URI = 'http://127.0.0.1:20000'
 # Client
 # -------------------------------------------------------------------------------------------------
 ###################################################################################################
-class Client(xc.ServerProxy):
+class Client(Proxy):
     def run(self, name, *args, result=True, stdout=False, stderr=False):
         from sys import stderr
         # run keyword
@@ -46,6 +44,101 @@ class Client(xc.ServerProxy):
                 report['output'] = out.splitlines()
         return report.popitem()[1] if len(report) == 1 else report
 
+    def run_stream(self, name, *args, write=None, wait=1):
+        from sys           import stdout
+        from xmlrpc.client import Fault
+        # output is written as it arrives
+        write = write or stdout.write
+        try:
+            sid   = self.run('stream', name, *args)
+        except (Fault, RuntimeError):
+            # older workers (no stream keyword): output at the end of the call
+            chunk = self.run_keyword(name, args)
+            write(chunk.get('output', ''))
+        else:
+            chunk = dict(cursor=0, done=False)
+            while not chunk['done']:
+                chunk = self.run('read_output', sid, chunk['cursor'], wait)
+                write(chunk['data'])
+        if chunk.get('status', 'FAIL') == 'FAIL':
+            raise RuntimeError(chunk.get('error', 'unknown'))
+        return chunk.get('return', None)
+
+    # -------------------------------------------------------------------------
+    # library description (one call), @cached: previous description
+    # -------------------------------------------------------------------------
+    def get_library(self, cached=None):
+        from xmlrpc.client import Fault
+        cached = cached or {}
+        try:
+            library = self.run('get_library', cached.get('version', ''))
+        except (Fault, RuntimeError):
+            # older workers: keyword by keyword
+            return dict(version='', keywords={
+                name: dict(args=self.get_keyword_arguments(name))
+                for name in self.get_keyword_names()})
+        return library if 'keywords' in library else cached
+
+    # -------------------------------------------------------------------------
+    # broadcast (keyword on every service matching the patterns)
+    # -------------------------------------------------------------------------
+    def broadcast(self, pattern, name, *args):
+        return self.run('broadcast', pattern, name, *args) or {}
+
+    # -------------------------------------------------------------------------
+    # jobs (keywords run in background on the worker)
+    # -------------------------------------------------------------------------
+    def submit_job(self, name, *args):
+        return self.run('submit_job', name, *args)
+
+    def job_status(self, jid):
+        return self.run('get_job_status', jid)
+
+    def wait_job(self, jid, timeout=None):
+        return self.run('wait_job', jid, *([] if timeout is None else [timeout]))
+
+    def job_result(self, jid):
+        report = self.run('get_job_result', jid)
+        if report.pop('status', 'FAIL') == 'FAIL':
+            raise RuntimeError(report.get('error', 'unknown'))
+        return report
+
+    def cancel_job(self, jid):
+        return self.run('cancel_job', jid)
+
+    # -------------------------------------------------------------------------
+    # files (chunked, resumable, content addressed)
+    # -------------------------------------------------------------------------
+    def push_file(self, path, servers='', target='', chunk=1 << 20):
+        from .files import hash_file, send_blob
+        digest = hash_file(path, chunk)
+        sent   = send_blob(path, digest, self.run, chunk)
+        if servers:
+            report = self.run('push_file', f'blob:{digest}', servers, target)
+            report['sent'][''] = str(sent)
+            return report
+        report = dict(digest=digest, sent={'': str(sent)}, target={})
+        if target:
+            report['target'][''] = self.run('blob_export', digest, target)
+        return report
+
+    def pull_file(self, source, target, server='', store=None):
+        from .files import BlobStore, receive_blob
+        if server:
+            blob = self.run('pull_file', server, source)
+        else:
+            blob = self.run('blob_add', source)
+        store    = BlobStore(store)
+        received = receive_blob(store, blob['digest'], blob['size'], self.run)
+        return dict(blob, received=str(received), target=store.export(blob['digest'], target))
+
+    def run_batch(self, calls, stop=True):
+        # calls: (name, args, kwargs) - args and kwargs are optional
+        def item(name, args=(), kwargs={}):
+            return [name, list(args), dict(kwargs)]
+        mode = 'stop' if stop else 'continue'
+        return self.run('batch', [item(*call) for call in calls], mode) or []
+
 ###################################################################################################
 # -------------------------------------------------------------------------------------------------
 # environment
@@ -55,12 +148,17 @@ class Environment:
     # -------------------------------------------------------------------------
     # init environment
     # -------------------------------------------------------------------------
-    def __init__(self, path):
+    def __init__(self, path, ttl=300):
         self.__path = path
+        self.__ttl  = float(ttl)
+        self.__data = None
         try:
             self.load(path)
         except Exception:
             self.reset(URI)
+        # resolved service paths: (root uri, name, ...) -> (uri, time)
+        self.__env.setdefault('cache', {})
+        self.__stack = list(self.__env['stack'])
 
     # -------------------------------------------------------------------------
     # delete environment
@@ -72,8 +170,10 @@ class Environment:
     # load environment
     # -------------------------------------------------------------------------
     def load(self, path):
+        from pickle import loads
         with open(path, 'rb') as f:
-            self.__env = pk.load(f)
+            self.__data = f.read()
+        self.__env = loads(self.__data)
 
     # -------------------------------------------------------------------------
     # reset environment
@@ -81,20 +181,29 @@ class Environment:
     def reset(self, uri):
         from collections import OrderedDict
         self.__env = dict(
-            stack = [('worker', dict(uri=uri))])
+            stack = [('worker', dict(uri=uri))],
+            cache = {})
 
     # -------------------------------------------------------------------------
     # save environment
     # -------------------------------------------------------------------------
-    def save(self):
+    def save(self, selection=True):
+        from pickle import dumps
+        # without selection: keep the stack as loaded (resolved paths are saved)
+        env  = self.__env if selection else dict(self.__env, stack=self.__stack)
+        data = dumps(env)
+        # rewrite only on changes
+        if data == self.__data:
+            return
         with open(self.__path, 'wb') as f:
-            pk.dump(self.__env, f)
+            f.write(data)
+        self.__data = data
 
     # -------------------------------------------------------------------------
     # discard environment
     # -------------------------------------------------------------------------
     def discard(self):
-        def ignore(): 
+        def ignore(*args, **kwargs): 
             pass
         setattr(self, 'save', ignore)
     
@@ -130,37 +239,55 @@ class Environment:
     # -------------------------------------------------------------------------
     # connect
     # -------------------------------------------------------------------------
-    def connect(self):
+    def connect(self, size=1):
         # get servive url
         _, ctxt = self.get_selection()
-        # create a client
-        return Client(ctxt['uri'])
+        # create a client (connection failures invalidate resolved paths)
+        return Client(ctxt['uri'], PoolTransport(size=size), failed=self.invalidate)
+
+    # -------------------------------------------------------------------------
+    # library of the selection (kept per uri, fetched again on version changes)
+    # -------------------------------------------------------------------------
+    def get_library(self):
+        _, ctxt = self.get_selection()
+        cache   = self.__env.setdefault('library', {})
+        cache[ctxt['uri']] = self.connect().get_library(cache.get(ctxt['uri']))
+        return cache[ctxt['uri']]
+
+    # -------------------------------------------------------------------------
+    # invalidate resolved paths (current selection and below)
+    # -------------------------------------------------------------------------
+    def invalidate(self):
+        key   = self.__key()
+        cache = self.__env['cache']
+        for path in [path for path in cache if path[:len(key)] == key]:
+            del cache[path]
     
     # -------------------------------------------------------------------------
     # check service
     # -------------------------------------------------------------------------
     def check(self, timeout=10):
-        from time import time, sleep
-        end = time() + timeout
-        while time() <= end:
+        from time import monotonic as now, sleep
+        end, delay = now() + timeout, 0.01
+        while True:
             try:
                 # test server
                 self.connect().get_keyword_names()
                 # return server information
                 return self.get_selection()
-            except:
-                # wait
-                sleep(1)
-        # test server
-        self.connect().get_keyword_names()
-        # return server information
-        return self.get_selection()
+            except Exception:
+                if now() + delay > end:
+                    raise
+                # wait (backoff up to half a second)
+                sleep(delay)
+                delay = min(delay * 2, 0.5)
         
     # -------------------------------------------------------------------------
     # select service
     # -------------------------------------------------------------------------
-    def select(self, path):
+    def select(self, path, cached=True):
         from posixpath import normpath 
+        stack = list(self.__env['stack'])
         # process path elements
         for name in normpath(path).split('/'):
             if name == '':
@@ -171,21 +298,108 @@ class Environment:
                 continue
             if name == '.':
                 continue
-            # connet to server
-            cnt = self.connect()
-            # get address
-            uri = cnt.run('get_services')[name]
+            # resolved before
+            uri = self.__cached(self.__key() + (name,)) if cached else None
+            if uri is None:
+                # connet to server
+                try:
+                    services = self.connect().run('get_services')
+                except OSError:
+                    if not cached:
+                        raise
+                    # a resolved node is gone, resolve again
+                    self.__env['stack'] = stack
+                    return self.select(path, cached=False)
+                # get address (siblings are kept too)
+                self.__store(self.__key(), services)
+                uri = services[name]
             # get servive address
             self.push_selection(name, uri)
         return self
 
+    # -------------------------------------------------------------------------
+    # resolved paths
+    # -------------------------------------------------------------------------
+    def __key(self):
+        root, *path = self.__env['stack']
+        return (root[1]['uri'],) + tuple(name for name, _ in path)
+
+    def __cached(self, key):
+        from time import time
+        uri, stamp = self.__env['cache'].get(key, (None, 0))
+        return uri if time() - stamp <= self.__ttl else None
+
+    def __store(self, key, services):
+        from time import time
+        for name, uri in services.items():
+            self.__env['cache'][key + tuple(name.split('.'))] = (uri, time())
+
 # #######################################################################################
 # ---------------------------------------------------------------------------------------
-# environment dry : changes are not saved
+# environment dry : selection changes are not saved (resolved paths are)
 # ---------------------------------------------------------------------------------------
 class DiscardedEnvironment(Environment):
     def __del__(self):
-        pass
+        self.save(selection=False)
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# session : keywords from a jsonl stream, up to depth requests in flight
+#   request : {"id": any, "keyword": "server.keyword", "args": [...], "kwargs": {...}}
+#   response: {"id": any, "status": .., "return": .., "output": .., "error": ..} (as completed)
+#   binary values are tagged as in the json codec ({"__binary__": base64})
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Session:
+    # -------------------------------------------------------------------------
+    # init session
+    # -------------------------------------------------------------------------
+    def __init__(self, client, depth=8):
+        from threading import Lock, BoundedSemaphore
+        self.__client = client
+        self.__depth  = int(depth)
+        self.__slots  = BoundedSemaphore(self.__depth)
+        self.__lock   = Lock()
+
+    # -------------------------------------------------------------------------
+    # run session (until the end of source)
+    # -------------------------------------------------------------------------
+    def __call__(self, source, sink):
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(self.__depth) as pool:
+            for number, line in enumerate(source, 1):
+                if not line.strip():
+                    continue
+                # wait for a free slot (back pressure on the source)
+                self.__slots.acquire()
+                future = pool.submit(self.__execute, number, line)
+                future.add_done_callback(lambda done: self.__finish(done, sink))
+
+    # -------------------------------------------------------------------------
+    # helpers
+    # -------------------------------------------------------------------------
+    def __execute(self, number, line):
+        from .codec import JsonCodec
+        rid = number
+        try:
+            request   = JsonCodec.loads(line)
+            rid       = request.get('id', number)
+            cmd, args = transform(request['keyword'], request.get('args', []))
+            kwargs    = request.get('kwargs', {})
+            report    = self.__client.run_keyword(cmd, args, *([kwargs] if kwargs else []))
+        except Exception as ex:
+            report    = dict(status='FAIL', error=str(ex))
+        return dict(report, id=rid)
+
+    def __finish(self, done, sink):
+        from .codec import JsonCodec
+        try:
+            data = JsonCodec.dumps(done.result()).decode('utf-8')
+            with self.__lock:
+                sink.write(data + '\n')
+                sink.flush()
+        finally:
+            self.__slots.release()
 
 ###################################################################################################
 # -------------------------------------------------------------------------------------------------
@@ -206,17 +420,105 @@ class Robot:
     # -------------------------------------------------------------------------
     # execute 
     # -------------------------------------------------------------------------
-    def __call__(self, select, servers):
+    def __call__(self, select, servers, processes=None, by=None):
         from robot.run import run_cli
         # merge data with profile
         data = self.merge(self.__profile, 
             select =select, 
             servers=servers)
+        # parallel settings (arguments over profile)
+        parallel  = dict(data.get('parallel', {}))
+        pins      = self.pins(parallel.get('pin', {}), servers)
+        processes = int(processes or parallel.get('processes', 0)
+            or max([len(hosts) for hosts in pins.values()] or [1]))
+        if processes > 1:
+            return self.parallel(data, processes, by or parallel.get('by', 'suite'), pins)
         # serialize merged profile
         data = self.serialize(data)
         # run merged profile
         run_cli(data)
 
+    # -------------------------------------------------------------------------
+    # parallel: shards run as robot processes, outputs merged with rebot
+    #   @by  : suite (leaf suites) | test
+    #   @pins: variable -> hosts, shards take the hosts round robin
+    # -------------------------------------------------------------------------
+    def parallel(self, profile, processes, by, pins):
+        from subprocess import Popen
+        from sys        import executable
+        from os.path    import join, abspath
+        from robot      import rebot_cli
+        options = profile.get('options', {})
+        root    = abspath(options.get('outputdir', '.'))
+        command = self.serialize(profile)
+        shards  = self.shards(profile, processes, by)
+        # start shards
+        running = []
+        for index, items in enumerate(shards):
+            output = join(root, 'shards', f'{index:03d}')
+            args   = ['--outputdir', output, '--output', 'output.xml', '--log', 'NONE',
+                      '--report', 'NONE', '--consolecolors', 'off']
+            for key, hosts in pins.items():
+                args += ['--variable', f'{key}_host:{hosts[index % len(hosts)]}']
+            for item in items:
+                args += [f'--{by}', item]
+            running.append((output, items, Popen(
+                [executable, '-m', 'robot'] + command[:-1] + args + command[-1:])))
+        report = dict(shards=[dict(
+            output=output, items=len(items), rc=process.wait()) for output, items, process in running])
+        # merge outputs
+        merged = ['--outputdir', root, '--merge']
+        for opt in ('output', 'log', 'report', 'name'):
+            if opt in options:
+                merged += [f'--{opt}', options[opt]]
+        report['rc'] = rebot_cli(
+            merged + [join(shard['output'], 'output.xml') for shard in report['shards']], exit=False)
+        return report
+
+    # -------------------------------------------------------------------------
+    # shards: leaf suites or tests (selected tags) balanced by test count
+    # -------------------------------------------------------------------------
+    def shards(self, profile, processes, by):
+        from robot.api import TestSuiteBuilder
+        suite = TestSuiteBuilder().build(profile.get('start', '.'))
+        suite.filter(included_tags=profile.get('select') or None)
+        # full_name since robot framework 7 (longname before)
+        name = lambda item: getattr(item, 'full_name', None) or item.longname
+        if by == 'test':
+            items = [(name(test), 1) for test in suite.all_tests]
+        else:
+            items, pending = [], [suite]
+            while pending:
+                current = pending.pop()
+                pending.extend(current.suites)
+                if current.tests:
+                    items.append((name(current), len(current.tests)))
+        if not items:
+            raise RuntimeError(f'no {by} to run')
+        # largest first, each to the least loaded shard
+        shards = [[0, []] for _ in range(min(processes, len(items)))]
+        for name, weight in sorted(items, key=lambda item: -item[1]):
+            shard = min(shards, key=lambda shard: shard[0])
+            shard[0] += weight
+            shard[1].append(name)
+        return [names for _, names in shards]
+
+    # -------------------------------------------------------------------------
+    # pins: variable -> hosts of the servers matching a pattern ({sut: 'dut*'})
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def pins(pattern, servers):
+        from fnmatch      import fnmatchcase
+        from .helper      import parse_text
+        pins = {}
+        for key, match in pattern.items():
+            hosts = [parse_text(uri, 'http://(.+:.+)')
+                     for name, uri in servers.items() if fnmatchcase(name, match)]
+            if not hosts:
+                raise RuntimeError(f'pin {key}: no server matches {match}')
+            pins[key] = hosts
+        return pins
+
     # -------------------------------------------------------------------------
     # loader
     # -------------------------------------------------------------------------
@@ -287,20 +589,29 @@ import click
 @click.group()
 @click.option('--env'   , default='.us.env', type=click.Path())
 @click.option('--select', default= None    , type=click.STRING)
+@click.option('--ttl'   , default= 300     , type=click.FLOAT, help='seconds resolved paths are kept')
 @click.pass_context
-def cli(ctx, env, select):
+def cli(ctx, env, select, ttl):
     try:
         # create environment
         if select:
             # temporary
-            ctx.obj = DiscardedEnvironment(env)
+            ctx.obj = DiscardedEnvironment(env, ttl)
             ctx.obj.select(select)
             return
         # default
-        ctx.obj = Environment(env)
+        ctx.obj = Environment(env, ttl)
     except Exception as ex:
         raise click.ClickException(str(ex))
 
+# ---------------------------------------------------------------------------------------
+# transform name & args (server.keyword -> proxy server keyword)
+# ---------------------------------------------------------------------------------------
+def transform(name, args):
+    path = name.split('.')
+    path = [x for c in path[:-1] for x in ['proxy', c]] + path[-1:]
+    return (path[0], path[1:] + list(args)) 
+
 # ---------------------------------------------------------------------------------------
 # list keywords
 # ---------------------------------------------------------------------------------------
@@ -308,12 +619,12 @@ def cli(ctx, env, select):
 @click.pass_obj
 def list_keywords(env):
     try:
-        # connet to server
-        client = env.connect()
+        # get library (cached)
+        library = env.get_library()
         # list keyworks
         click.echo(f'{"COMMAND":30} {"ARGUMENTS"}')
-        for key in client.get_keyword_names():
-            click.echo(f'{key:30} [{" ".join(client.get_keyword_arguments(key))}]')
+        for key, keyword in library['keywords'].items():
+            click.echo(f'{key:30} [{" ".join(keyword["args"])}]')
     except ConnectionRefusedError as ex:
         raise click.ClickException(ex)
 
@@ -322,23 +633,29 @@ def list_keywords(env):
 # ---------------------------------------------------------------------------------------
 SETTINGS=dict(ignore_unknown_options=True)
 @cli.command('.', help='execute keyword', context_settings=SETTINGS)
+@click.option('--stream', is_flag=True, help='print output as it arrives')
 @click.argument('name', nargs= 1, type=click.STRING)
 @click.argument('args', nargs=-1, type=click.STRING)
 @click.pass_obj
-def execute_keyword(env, name, args):
-    from yaml import dump
-    # transform name & args
-    def transform(name, args):
-        path = name.split('.')
-        path = [x for c in path[:-1] for x in ['proxy', c]] + path[-1:]
-        return (path[0], path[1:] + list(args)) 
+def execute_keyword(env, stream, name, args):
+    write = lambda data: click.echo(data, nl=False)
+    def run(client, keyword, *args):
+        if stream:
+            return client.run_stream(keyword, *args, write=write)
+        # one round trip, output at the end of the call
+        report = client.run_keyword(keyword, args)
+        write(report.get('output', ''))
+        if report.get('status', 'FAIL') == 'FAIL':
+            raise RuntimeError(report.get('error', 'unknown'))
+        return report.get('return', None)
     try:
-        # connet to server
-        client    = env.connect()
-        # create path
+        # nested service (a.b.keyword): run by the selection, it goes straight to the
+        # last service when it can (its cache, metrics and spans apply to the call)
         cmd, args = transform(name, args)
-        # execute command
-        click.echo(dump(client.run(cmd, *args, stdout=True), sort_keys=False))
+        result    = run(env.connect(), cmd, *args)
+        if result is not None:
+            from yaml import dump
+            click.echo(dump(result, sort_keys=False))
     except ConnectionRefusedError as ex:
         raise click.ClickException(ex)
     except RuntimeError as ex:
@@ -346,6 +663,229 @@ def execute_keyword(env, name, args):
     except Exception as ex:
         raise click.ClickException(ex)
 
+# ---------------------------------------------------------------------------------------
+# session (jsonl requests from stdin, responses to stdout)
+# ---------------------------------------------------------------------------------------
+@cli.command('session', help='execute keywords from jsonl (stdin)')
+@click.option('--depth', default=8, nargs= 1, type=click.INT, help='requests in flight')
+@click.pass_obj
+def session(env, depth):
+    from sys import stdin, stdout
+    try:
+        Session(env.connect(depth), depth)(stdin, stdout)
+    except Exception as ex:
+        raise click.ClickException(str(ex))
+    except KeyboardInterrupt as ex:
+        raise click.Abort(ex)
+
+# ---------------------------------------------------------------------------------------
+# broadcast
+# ---------------------------------------------------------------------------------------
+@cli.command('broadcast', help='execute keyword on services (a.*, **, ...)', context_settings=SETTINGS)
+@click.option('--output', is_flag=True, help='print keyword output')
+@click.argument('pattern', nargs= 1, type=click.STRING)
+@click.argument('name'   , nargs= 1, type=click.STRING)
+@click.argument('args'   , nargs=-1, type=click.STRING)
+@click.pass_obj
+def broadcast(env, output, pattern, name, args):
+    try:
+        report = env.connect().broadcast(pattern, name, *args)
+        click.echo(f'{"SERVICE":30}{"STATUS":8}{"LATENCY":>10}  {"RESULT"}')
+        for path, entry in sorted(report.items()):
+            result = entry.get('error') if entry['status'] == 'FAIL' else entry.get('return', '')
+            click.echo(f'{path:30}{entry["status"]:8}{entry["latency"] * 1e3:>8.1f}ms  {result}')
+            if output and entry.get('output'):
+                click.echo(entry['output'], nl=False)
+    except Exception as ex:
+        raise click.ClickException(str(ex))
+
+# ---------------------------------------------------------------------------------------
+# trace: execute keyword in a new trace and print its span tree
+# ---------------------------------------------------------------------------------------
+@cli.command('trace', help='execute keyword and print its spans', context_settings=SETTINGS)
+@click.argument('name', nargs= 1, type=click.STRING)
+@click.argument('args', nargs=-1, type=click.STRING)
+@click.pass_obj
+def trace_keyword(env, name, args):
+    from time     import sleep
+    from .tracing import trace, tree, recorded
+    try:
+        client    = env.connect()
+        cmd, args = transform(name, args)
+        with trace(f'work {name}') as root:
+            try:
+                client.run(cmd, *args)
+            except RuntimeError as ex:
+                root['tags']['error'] = str(ex)
+        # server spans end once their response is written
+        sleep(0.05)
+        spans = recorded(root['traceId']) + client.run('get_spans', root['traceId'])
+        click.echo(f'trace {root["traceId"]}')
+        click.echo(f'{"SPAN":50}{"SERVICE":24}{"TOTAL":>10}{"SELF":>10}')
+        for depth, span in tree(spans):
+            total    = int(span['duration'])
+            children = sum(int(s['duration']) for s in spans if s.get('parentId') == span['id'])
+            endpoint = span.get('localEndpoint', {})
+            service  = f'{endpoint.get("serviceName", "")}:{endpoint.get("port", "")}'.rstrip(':')
+            failed   = 'error' in span['tags'] or span['tags'].get('status') == 'FAIL'
+            label    = '  ' * depth + span['name'] + (' !' if failed else '')
+            click.echo(f'{label:50}{service:24}{total / 1e3:>8.2f}ms{max(total - children, 0) / 1e3:>8.2f}ms')
+    except Exception as ex:
+        raise click.ClickException(str(ex))
+
+# ---------------------------------------------------------------------------------------
+# jobs
+# ---------------------------------------------------------------------------------------
+@cli.group('job', help='background jobs')
+def job():
+    pass
+
+@job.command('submit', help='submit keyword', context_settings=SETTINGS)
+@click.argument('name', nargs= 1, type=click.STRING)
+@click.argument('args', nargs=-1, type=click.STRING)
+@click.pass_obj
+def submit_job(env, name, args):
+    try:
+        cmd, args = transform(name, args)
+        click.echo(env.connect().submit_job(cmd, *args))
+    except Exception as ex:
+        raise click.ClickException(str(ex))
+
+@job.command('status', help='job status')
+@click.argument('jid', nargs= 1, type=click.STRING)
+@click.pass_obj
+def job_status(env, jid):
+    from yaml import dump
+    try:
+        click.echo(dump(env.connect().job_status(jid), sort_keys=False))
+    except Exception as ex:
+        raise click.ClickException(str(ex))
+
+@job.command('wait', help='wait job')
+@click.option('--timeout', default=None, nargs= 1, type=click.FLOAT)
+@click.argument('jid', nargs= 1, type=click.STRING)
+@click.pass_obj
+def wait_job(env, timeout, jid):
+    from yaml import dump
+    try:
+        click.echo(dump(env.connect().wait_job(jid, timeout), sort_keys=False))
+    except Exception as ex:
+        raise click.ClickException(str(ex))
+
+@job.command('result', help='job result')
+@click.argument('jid', nargs= 1, type=click.STRING)
+@click.pass_obj
+def job_result(env, jid):
+    from yaml import dump
+    try:
+        report = env.connect().job_result(jid)
+        click.echo(report.pop('output', ''), nl=False)
+        click.echo(dump(report.get('return'), sort_keys=False))
+    except Exception as ex:
+        raise click.ClickException(str(ex))
+
+@job.command('cancel', help='cancel job')
+@click.argument('jid', nargs= 1, type=click.STRING)
+@click.pass_obj
+def cancel_job(env, jid):
+    try:
+        click.echo(env.connect().cancel_job(jid))
+    except Exception as ex:
+        raise click.ClickException(str(ex))
+
+@job.command('list', help='list jobs')
+@click.pass_obj
+def list_jobs(env):
+    try:
+        click.echo(f'{"JOB":34}{"KEYWORD":30}{"STATE"}')
+        for status in env.connect().run('get_jobs') or []:
+            click.echo(f'{status["id"]:34}{status["keyword"]:30}{status["state"]}')
+    except Exception as ex:
+        raise click.ClickException(str(ex))
+
+# ---------------------------------------------------------------------------------------
+# profiles
+# ---------------------------------------------------------------------------------------
+@cli.group('profile', help='profile keywords on a service')
+def profile():
+    pass
+
+def profile_call(env, service, name, *args):
+    cmd, args = transform(f'{service}.{name}' if service else name, args)
+    return env.connect().run(cmd, *args)
+
+@profile.command('start', help='profile next calls (all keywords without name)')
+@click.option('--service', default='' , help='service path (a.b)')
+@click.option('--calls'  , default=0  , type=click.INT  , help='stop after n calls')
+@click.option('--seconds', default=0.0, type=click.FLOAT, help='stop after n seconds')
+@click.option('--memory' , is_flag=True, help='tracemalloc differences')
+@click.argument('name'   , default='' , nargs= 1, type=click.STRING)
+@click.pass_obj
+def start_profile(env, service, calls, seconds, memory, name):
+    from yaml import dump
+    try:
+        click.echo(dump(profile_call(
+            env, service, 'start_profile', name, str(calls), str(seconds), str(memory)), sort_keys=False))
+    except Exception as ex:
+        raise click.ClickException(str(ex))
+
+@profile.command('stop', help='stop profile')
+@click.option('--service', default='', help='service path (a.b)')
+@click.pass_obj
+def stop_profile(env, service):
+    from yaml import dump
+    try:
+        click.echo(dump(profile_call(env, service, 'stop_profile'), sort_keys=False))
+    except Exception as ex:
+        raise click.ClickException(str(ex))
+
+@profile.command('show', help='show last profile')
+@click.option('--service', default='' , help='service path (a.b)')
+@click.option('--format' , default='pstats', type=click.Choice(['pstats', 'collapsed', 'memory', 'raw']))
+@click.option('--limit'  , default=30 , type=click.INT, help='lines (pstats, memory)')
+@click.option('--sort'   , default='cumulative', help='pstats sort key')
+@click.option('--output' , default=None, type=click.Path(dir_okay=False), help='write to file')
+@click.pass_obj
+def show_profile(env, service, format, limit, sort, output):
+    try:
+        if format == 'raw' and not output:
+            raise RuntimeError('raw profile needs an output file (pstats file)')
+        data = profile_call(env, service, 'get_profile', format, str(limit), sort)
+        data = getattr(data, 'data', data)
+        if not output:
+            return click.echo(data, nl=False)
+        with open(output, 'wb' if isinstance(data, bytes) else 'w') as f:
+            f.write(data)
+    except Exception as ex:
+        raise click.ClickException(str(ex))
+
+# ---------------------------------------------------------------------------------------
+# files
+# ---------------------------------------------------------------------------------------
+@cli.command('push', help='push file')
+@click.option('--to'    , 'servers', default='', help='service paths (a.b,a.c)')
+@click.option('--target', default='', help='remote path')
+@click.argument('path'  , nargs= 1, type=click.Path(exists=True, dir_okay=False))
+@click.pass_obj
+def push_file(env, servers, target, path):
+    from yaml import dump
+    try:
+        click.echo(dump(env.connect().push_file(path, servers, target), sort_keys=False))
+    except Exception as ex:
+        raise click.ClickException(str(ex))
+
+@cli.command('pull', help='pull file')
+@click.option('--from', 'server', default='', help='service path (a.b)')
+@click.argument('source', nargs= 1, type=click.STRING)
+@click.argument('target', nargs= 1, type=click.Path(dir_okay=False))
+@click.pass_obj
+def pull_file(env, server, source, target):
+    from yaml import dump
+    try:
+        click.echo(dump(env.connect().pull_file(source, target, server), sort_keys=False))
+    except Exception as ex:
+        raise click.ClickException(str(ex))
+
 # ---------------------------------------------------------------------------------------
 # list services
 # ---------------------------------------------------------------------------------------
@@ -386,17 +926,20 @@ def select_service(env, timeout, path):
 # run robot
 # ---------------------------------------------------------------------------------------
 @cli.command('robot', help='run robot')
+@click.option('--processes', default=None, type=click.INT, help='parallel shards')
+@click.option('--by', default=None, type=click.Choice(['suite', 'test']), help='shard by')
 @click.argument('select', nargs= -1, type=click.STRING)
 @click.argument('profile', nargs= 1,  type=click.STRING)
 @click.pass_obj
-def robot(env, select, profile):
+def robot(env, processes, by, select, profile):
+    from yaml import dump
     try:
         # create robot
         robot = Robot(profile)
         # get servers
         servers = env.connect().run('get_services')
         # run robot
-        click.echo(robot(select, servers))
+        click.echo(dump(robot(select, servers, processes, by), sort_keys=False))
     except Exception as ex:
         env.discard()
         raise click.ClickException(ex)
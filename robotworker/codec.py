@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Codec}                                                    ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# imports
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from xmlrpc.client      import Binary, Fault
+from base64             import b64encode, b64decode
+import json
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# negotiation
+#   servers advertise their codecs on every response (HEADER: name, name, ...), clients switch
+#   to the first codec both sides know, requests are sent with the codec content type
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+HEADER = 'X-Robotworker-Codecs'
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Json Codec
+#   binary values are tagged ({"__binary__": base64})
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class JsonCodec(object):
+    name         = 'json'
+    content_type = 'application/json'
+
+    @staticmethod
+    def dumps(data):
+        return json.dumps(
+            data, default=JsonCodec.__default, ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8')
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data, object_hook=JsonCodec.__hook)
+
+    @staticmethod
+    def __default(value):
+        if isinstance(value, Binary):
+            value = value.data
+        if isinstance(value, (bytes, bytearray)):
+            return {'__binary__': b64encode(value).decode('ascii')}
+        return str(value)
+
+    @staticmethod
+    def __hook(value):
+        if len(value) == 1 and '__binary__' in value:
+            return b64decode(value['__binary__'])
+        return value
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Msgpack Codec (msgpack package)
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class MsgpackCodec(object):
+    name         = 'msgpack'
+    content_type = 'application/msgpack'
+
+    @staticmethod
+    def dumps(data):
+        from msgpack import packb
+        return packb(data, use_bin_type=True, default=MsgpackCodec.__default)
+
+    @staticmethod
+    def loads(data):
+        from msgpack import unpackb
+        return unpackb(data, raw=False, strict_map_key=False)
+
+    @staticmethod
+    def __default(value):
+        if isinstance(value, Binary):
+            return value.data
+        return str(value)
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# available codecs (preferred first)
+# -------------------------------------------------------------------------------------------------
+def available():
+    from importlib.util import find_spec
+    codecs = [JsonCodec]
+    if find_spec('msgpack'):
+        codecs.insert(0, MsgpackCodec)
+    return codecs
+
+CODECS = available()
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# advertised codecs (header value)
+# -------------------------------------------------------------------------------------------------
+def advertise():
+    return ', '.join(codec.name for codec in CODECS)
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# codec for a request/response content type (None for xml)
+# -------------------------------------------------------------------------------------------------
+def find(content_type):
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    for codec in CODECS:
+        if codec.content_type == content_type:
+            return codec
+    return None
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# choose a codec from an advertised list (None: keep xml)
+#   @prefer: codec name, 'xml' disables negotiation
+# -------------------------------------------------------------------------------------------------
+def choose(advertised, prefer=None):
+    names = [name.strip() for name in (advertised or '').split(',')]
+    if prefer:
+        names = [name for name in names if name == prefer]
+    for codec in CODECS:
+        if codec.name in names:
+            return codec
+    return None
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# messages
+#   call    : {"method": name, "params": [...]}
+#   response: {"result": value} | {"fault": {"code": int, "string": str}}
+# -------------------------------------------------------------------------------------------------
+def dump_call(codec, method, params):
+    return codec.dumps({'method': method, 'params': list(params)})
+
+def load_call(codec, data):
+    message = codec.loads(data)
+    return message['method'], message.get('params', [])
+
+def dump_result(codec, value):
+    return codec.dumps({'result': value})
+
+def dump_fault(codec, fault):
+    return codec.dumps({'fault': {'code': fault.faultCode, 'string': fault.faultString}})
+
+def load_result(codec, data):
+    message = codec.loads(data)
+    if 'fault' in message:
+        raise Fault(message['fault']['code'], message['fault']['string'])
+    return message['result']
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# End
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
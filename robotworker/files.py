@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Files}                                                    ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# imports
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from os                 import makedirs, replace, remove, link, chmod
+from os.path            import join, exists, getsize, dirname, abspath
+from contextlib         import contextmanager
+from threading          import Lock
+from hashlib            import sha256
+from zlib               import crc32
+from mmap               import mmap, ACCESS_READ
+from shutil             import copyfile
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Blob Store
+#   content-addressed files (sha256), partial uploads are kept and resumed
+#   offsets and sizes go as strings (xmlrpc integers are 32 bits), checksums as crc32 hex
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class BlobStore(object):
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   constructor
+    #   @root : store directory
+    #   @chunk: transfer chunk size
+    # -----------------------------------------------------------------------------------
+    def __init__(self, root=None, chunk=1 << 20):
+        from tempfile import gettempdir
+        self.chunk   = int(chunk)
+        self.__root  = abspath(root or join(gettempdir(), 'robotworker-blobs'))
+        self.__lock  = Lock()
+        self.__locks = {}
+        makedirs(join(self.__root, 'partial'), exist_ok=True)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   paths
+    # -----------------------------------------------------------------------------------
+    def path(self, digest):
+        return join(self.__root, digest[:2], digest)
+
+    def partial(self, digest):
+        return join(self.__root, 'partial', digest)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   status: present (size) or partial (offset to resume from)
+    # -----------------------------------------------------------------------------------
+    def status(self, digest):
+        check(digest)
+        if exists(self.path(digest)):
+            return dict(present=True, offset=str(getsize(self.path(digest))))
+        offset = getsize(self.partial(digest)) if exists(self.partial(digest)) else 0
+        return dict(present=False, offset=str(offset))
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   write a chunk to a partial blob, returns the next offset
+    #   a chunk at another offset is ignored (the sender seeks to the returned offset)
+    # -----------------------------------------------------------------------------------
+    def write(self, digest, offset, data, crc):
+        check(digest)
+        if checksum(data) != crc:
+            raise RuntimeError(f'blob {digest}: chunk at {offset} is corrupted')
+        with self.__locked(digest):
+            path = self.partial(digest)
+            size = getsize(path) if exists(path) else 0
+            if int(offset) != size:
+                return str(size)
+            with open(path, 'ab') as f:
+                f.write(data)
+            return str(size + len(data))
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   commit a partial blob (checksum verified), returns its size
+    # -----------------------------------------------------------------------------------
+    def commit(self, digest):
+        check(digest)
+        with self.__locked(digest):
+            if exists(self.path(digest)):
+                return str(getsize(self.path(digest)))
+            # nothing written: empty blob
+            path = self.partial(digest)
+            open(path, 'ab').close()
+            if hash_file(path, self.chunk) != digest:
+                remove(path)
+                raise RuntimeError(f'blob {digest}: checksum mismatch, transfer discarded')
+            makedirs(dirname(self.path(digest)), exist_ok=True)
+            replace(path, self.path(digest))
+            seal(self.path(digest))
+            return str(getsize(self.path(digest)))
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   read a chunk of a blob
+    # -----------------------------------------------------------------------------------
+    def read(self, digest, offset, size=None):
+        check(digest)
+        with mapped(self.path(digest)) as data:
+            offset = int(offset)
+            return bytes(data[offset:offset + int(size or self.chunk)])
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   add a local file (copied, the source may change), returns digest and size
+    # -----------------------------------------------------------------------------------
+    def add(self, source):
+        digest = hash_file(source, self.chunk)
+        with self.__locked(digest):
+            if not exists(self.path(digest)):
+                makedirs(dirname(self.path(digest)), exist_ok=True)
+                copyfile(source, self.partial(digest))
+                replace(self.partial(digest), self.path(digest))
+                seal(self.path(digest))
+        return dict(digest=digest, size=str(getsize(self.path(digest))))
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   export a blob to a path (read only hard link when possible)
+    # -----------------------------------------------------------------------------------
+    def export(self, digest, target):
+        check(digest)
+        if not exists(self.path(digest)):
+            raise RuntimeError(f'blob {digest}: not found')
+        target = abspath(target)
+        makedirs(dirname(target), exist_ok=True)
+        if exists(target):
+            remove(target)
+        try:
+            link(self.path(digest), target)
+        except OSError:
+            copyfile(self.path(digest), target)
+        return target
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   lock by digest
+    # -----------------------------------------------------------------------------------
+    @contextmanager
+    def __locked(self, digest):
+        with self.__lock:
+            lock = self.__locks.setdefault(digest, Lock())
+        with lock:
+            yield
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# send a local file as a blob
+#   @remote: (keyword, *args) -> value, blob keywords of the receiver
+#   @return: bytes sent (0 when the receiver has it)
+# -------------------------------------------------------------------------------------------------
+def send_blob(source, digest, remote, chunk=1 << 20):
+    status = remote('blob_status', digest)
+    if status['present']:
+        return 0
+    sent, offset = 0, int(status['offset'])
+    with mapped(source) as data:
+        while offset < len(data):
+            block   = bytes(data[offset:offset + chunk])
+            written = int(remote('blob_write', digest, str(offset), block, checksum(block)))
+            if written == offset + len(block):
+                sent += len(block)
+            offset = written
+    remote('blob_commit', digest)
+    return sent
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# receive a remote blob into a store
+#   @remote: (keyword, *args) -> value, blob keywords of the sender
+#   @return: bytes received (0 when the store has it)
+# -------------------------------------------------------------------------------------------------
+def receive_blob(store, digest, size, remote):
+    status = store.status(digest)
+    if status['present']:
+        return 0
+    received, offset, size = 0, int(status['offset']), int(size)
+    while offset < size:
+        block  = remote('blob_read', digest, str(offset), str(store.chunk))
+        if not block:
+            raise RuntimeError(f'blob {digest}: truncated at {offset}')
+        offset = int(store.write(digest, str(offset), block, checksum(block)))
+        received += len(block)
+    store.commit(digest)
+    return received
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# helpers
+# -------------------------------------------------------------------------------------------------
+# read only memory map (empty files map to b'')
+@contextmanager
+def mapped(path):
+    with open(path, 'rb') as f:
+        if getsize(path) == 0:
+            yield b''
+            return
+        with mmap(f.fileno(), 0, access=ACCESS_READ) as data:
+            view = memoryview(data)
+            try:
+                yield view
+            finally:
+                view.release()
+
+# sha256 of a file
+def hash_file(path, chunk=1 << 20):
+    digest = sha256()
+    with mapped(path) as data:
+        for offset in range(0, len(data), chunk):
+            digest.update(data[offset:offset + chunk])
+    return digest.hexdigest()
+
+# chunk checksum
+def checksum(data):
+    return f'{crc32(data):08x}'
+
+# stored blobs are read only (exports may be hard links)
+def seal(path):
+    chmod(path, 0o444)
+
+# valid digest
+def check(digest):
+    if len(digest) != 64 or not all(c in '0123456789abcdef' for c in digest):
+        raise ValueError(f'invalid blob digest: {digest}')
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# End
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
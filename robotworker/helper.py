@@ -5,8 +5,9 @@
 ###-Authors: Luis Monteiro                                                                     ##-#
 ###################################################################################################
 # function
-from os.path import normpath, join, exists, dirname
-from re      import match
+from os.path   import normpath, join, exists, dirname
+from re        import match
+from functools import lru_cache
 
 # typenames
 from collections import OrderedDict
@@ -41,21 +42,37 @@ def update_path(data, origin):
     # extract path
     origin = normpath(dirname(origin))
     def process(var):
-        if isinstance(var, set):
-            return set([process(v) for v in var])
-        if isinstance(var, list):
-            return [process(v) for v in var]
-        if isinstance(var, dict):
-            return {k:process(var[k]) for k in var}
-        if isinstance(var, OrderedDict):
-            return OrderedDict({k:process(var[k]) for k in var})
-        if isinstance(var, str):
-            if match('(\.\.?/.+)|(\.)', var):
-                path = normpath(join(origin, var))
-                if exists(path):
-                    return path
+        if match('(\.\.?/.+)|(\.)', var):
+            path = normpath(join(origin, var))
+            if exists(path):
+                return path
         return var
-    return process(data)
+    return rebuild(data, process)
+
+# #############################################################################
+# -----------------------------------------------------------------------------
+# rebuild a document (iterative), strings are mapped by func
+#   mappings are rebuilt as dict, lists as list and sets as set
+# -----------------------------------------------------------------------------
+def rebuild(data, func):
+    root  = [data]
+    stack = [(root, 0, data)]
+    while stack:
+        parent, key, var = stack.pop()
+        if isinstance(var, dict):
+            node = dict(var)
+            stack.extend((node, k, v) for k, v in node.items())
+        elif isinstance(var, list):
+            node = list(var)
+            stack.extend((node, i, v) for i, v in enumerate(node))
+        elif isinstance(var, set):
+            node = set(rebuild(list(var), func))
+        elif isinstance(var, str):
+            node = func(var)
+        else:
+            node = var
+        parent[key] = node
+    return root[0]
 
 # #############################################################################
 # -----------------------------------------------------------------------------
@@ -65,25 +82,85 @@ def update_path(data, origin):
 class Formater(Template): 
     idpattern = r'(?a:[_a-z][\.\-_a-z0-9]*)'
 
+# compiled templates (lru cache by source string)
+@lru_cache(maxsize=1024)
+def compile_text(text):
+    return Formater(text)
+
 # format a text string
 def format_text(text, context):
-    return Formater(text).substitute(context)
+    return compile_text(text).substitute(context)
+
+# compiled document: kept by callers that format the same document more than once
+# (the document is not to be changed while its formater is used)
+def compile_data(data):
+    return DocumentFormater(data)
 
-# fromat recurcively a document
+# fromat a document (untouched sub-trees are shared with the source)
 def format_data(data, context):
-    def process(var):
+    return compile_data(data).format(context)
+
+# #############################################################################
+# -----------------------------------------------------------------------------
+# document formater
+#   compiled once: records the paths of the strings with placeholders, each
+#   format copies only the containers on those paths
+# -----------------------------------------------------------------------------
+class DocumentFormater(object):
+    def __init__(self, data):
+        self.__data  = data
+        self.__paths = []
+        stack = [((), data)]
+        while stack:
+            path, var = stack.pop()
+            if isinstance(var, dict):
+                stack.extend((path + (k,), v) for k, v in var.items())
+            elif isinstance(var, list):
+                stack.extend((path + (i,), v) for i, v in enumerate(var))
+            elif isinstance(var, (set, str)) and self.__templated(var):
+                self.__paths.append(path)
+
+    # -------------------------------------------------------------------------
+    # placeholders paths
+    # -------------------------------------------------------------------------
+    def paths(self):
+        return list(self.__paths)
+
+    # -------------------------------------------------------------------------
+    # format document
+    # -------------------------------------------------------------------------
+    def format(self, context):
+        if () in self.__paths:
+            return self.__substitute(self.__data, context)
+        root   = self.__copy(self.__data)
+        copies = {(): root}
+        for path in self.__paths:
+            node = root
+            for i, key in enumerate(path[:-1], 1):
+                if path[:i] not in copies:
+                    copies[path[:i]] = node[key] = self.__copy(node[key])
+                node = copies[path[:i]]
+            node[path[-1]] = self.__substitute(node[path[-1]], context)
+        return root
+
+    # -------------------------------------------------------------------------
+    # helpers
+    # -------------------------------------------------------------------------
+    @staticmethod
+    def __templated(var):
         if isinstance(var, set):
-            return set([process(v) for v in var])
-        if isinstance(var, list):
-            return [process(v) for v in var]
-        if isinstance(var, dict):
-            return {k:process(var[k]) for k in var}
-        if isinstance(var, OrderedDict):
-            return OrderedDict({k:process(var[k]) for k in var})
-        if isinstance(var, str):
-            return Formater(var).substitute(context)
-        return var
-    return process(data)
+            return any(isinstance(v, str) and '$' in v for v in var)
+        return '$' in var
+
+    @staticmethod
+    def __substitute(var, context):
+        if isinstance(var, set):
+            return {format_text(v, context) if isinstance(v, str) else v for v in var}
+        return format_text(var, context)
+
+    @staticmethod
+    def __copy(var):
+        return type(var)(var) if isinstance(var, (dict, list)) else var
 
 # #############################################################################
 # -----------------------------------------------------------------------------
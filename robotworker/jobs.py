@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Jobs}                                                     ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# imports
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait                  as wait_futures
+from contextvars        import ContextVar, copy_context
+from threading          import Lock, Event
+from time               import time
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# state
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+# cancel event of the running job
+CANCEL = ContextVar('robotworker.cancel', default=None)
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Job
+#   one keyword call running in background
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Job(object):
+    def __init__(self, jid, name):
+        self.id        = jid
+        self.name      = name
+        self.state     = 'queued'
+        self.submitted = time()
+        self.started   = None
+        self.finished  = None
+        self.report    = None
+        self.future    = None
+        self.cancel    = Event()
+
+    def done(self):
+        return self.finished is not None
+
+    def status(self):
+        return dict(
+            id       =self.id,
+            keyword  =self.name,
+            state    =self.state,
+            submitted=self.submitted,
+            started  =self.started  or 0.0,
+            finished =self.finished or 0.0)
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Job Table
+#   bounded table of jobs, finished jobs expire after ttl seconds
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class JobTable(object):
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   constructor
+    #   @workers: jobs running at the same time
+    #   @size   : max jobs in the table (running, queued and finished)
+    #   @ttl    : seconds a finished job is kept
+    # -----------------------------------------------------------------------------------
+    def __init__(self, workers=4, size=256, ttl=600):
+        self.__pool = ThreadPoolExecutor(int(workers), thread_name_prefix='robotworker-job')
+        self.__size = int(size)
+        self.__ttl  = float(ttl)
+        self.__lock = Lock()
+        self.__jobs = {}
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   submit a call
+    #   @run : call -> report (status, return, error, output)
+    # -----------------------------------------------------------------------------------
+    def submit(self, name, run):
+        from uuid import uuid4
+        job = Job(uuid4().hex, name)
+        with self.__lock:
+            self.__expire()
+            if len(self.__jobs) >= self.__size:
+                raise RuntimeError(f'job table full ({self.__size} jobs)')
+            self.__jobs[job.id] = job
+        job.future = self.__pool.submit(copy_context().run, self.__run, job, run)
+        return job.id
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   job status
+    # -----------------------------------------------------------------------------------
+    def status(self, jid):
+        return self.get(jid).status()
+
+    def statuses(self):
+        with self.__lock:
+            return [job.status() for job in self.__jobs.values()]
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   wait for a job (up to timeout seconds)
+    # -----------------------------------------------------------------------------------
+    def wait(self, jid, timeout=None):
+        job = self.get(jid)
+        wait_futures([job.future], timeout)
+        return job.status()
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   job report (finished jobs)
+    # -----------------------------------------------------------------------------------
+    def result(self, jid):
+        job = self.get(jid)
+        if not job.done():
+            raise RuntimeError(f'job {jid} is {job.state}')
+        return dict(job.report)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   cancel a job
+    #   queued jobs never run, running jobs are flagged (see cancelled)
+    # -----------------------------------------------------------------------------------
+    def cancel(self, jid):
+        job = self.get(jid)
+        if job.done():
+            return False
+        job.cancel.set()
+        if job.future.cancel():
+            self.__finish(job, 'cancelled', dict(status='FAIL', error='cancelled'))
+        return True
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   find job
+    # -----------------------------------------------------------------------------------
+    def get(self, jid):
+        with self.__lock:
+            if jid not in self.__jobs:
+                raise KeyError(f'unknown job {jid}')
+            return self.__jobs[jid]
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   shutdown (queued jobs are cancelled)
+    # -----------------------------------------------------------------------------------
+    def close(self):
+        self.__pool.shutdown(wait=False, cancel_futures=True)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   helpers
+    # -----------------------------------------------------------------------------------
+    def __run(self, job, run):
+        if job.cancel.is_set():
+            return self.__finish(job, 'cancelled', dict(status='FAIL', error='cancelled'))
+        job.started, job.state = time(), 'running'
+        token = CANCEL.set(job.cancel)
+        try:
+            report = run()
+        except BaseException as ex:
+            # interrupted (the job is not left running)
+            self.__finish(job, 'failed', dict(status='FAIL', error=f'{type(ex).__name__}: {ex}'))
+            raise
+        finally:
+            CANCEL.reset(token)
+        state = 'passed' if report.get('status') == 'PASS' else 'failed'
+        self.__finish(job, 'cancelled' if job.cancel.is_set() else state, report)
+
+    def __finish(self, job, state, report):
+        job.report, job.state, job.finished = report, state, time()
+
+    def __expire(self):
+        limit = time() - self.__ttl
+        for jid, job in list(self.__jobs.items()):
+            if job.done() and job.finished < limit:
+                del self.__jobs[jid]
+        # table full: drop the oldest finished jobs
+        finished = sorted((j for j in self.__jobs.values() if j.done()), key=lambda j: j.finished)
+        while len(self.__jobs) >= self.__size and finished:
+            del self.__jobs[finished.pop(0).id]
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# running job was cancelled (long keywords may check it and stop early)
+# -------------------------------------------------------------------------------------------------
+def cancelled():
+    event = CANCEL.get()
+    return event is not None and event.is_set()
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# End
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
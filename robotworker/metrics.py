@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Metrics}                                                  ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# imports
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from bisect             import bisect_left
+from functools          import wraps
+from inspect            import iscoroutinefunction
+from threading          import Lock
+from time               import perf_counter          as now
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# latency buckets (seconds, upper bounds)
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Series
+#   calls, errors, in flight and latency histogram of one keyword (or proxy target)
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Series(object):
+    def __init__(self, buckets):
+        self.buckets  = buckets
+        self.calls    = 0
+        self.errors   = 0
+        self.inflight = 0
+        self.total    = 0.0
+        self.counts   = [0] * (len(buckets) + 1)
+
+    def observe(self, spent, failed):
+        self.calls  += 1
+        self.errors += bool(failed)
+        self.total  += spent
+        self.counts[bisect_left(self.buckets, spent)] += 1
+
+    # latency quantile estimate (linear within the bucket)
+    def quantile(self, q):
+        if not self.calls:
+            return 0.0
+        rank, seen = q * self.calls, 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                low  = self.buckets[index - 1] if index else 0.0
+                high = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def report(self):
+        return dict(
+            calls   =self.calls,
+            errors  =self.errors,
+            inflight=self.inflight,
+            mean    =self.total / self.calls if self.calls else 0.0,
+            p50     =self.quantile(0.50),
+            p90     =self.quantile(0.90),
+            p99     =self.quantile(0.99))
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Metrics
+#   series by (keyword, target): keywords have no target, proxy calls are measured by the
+#   service path they go to (target a.b, keyword)
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Metrics(object):
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   constructor
+    #   @port   : prometheus endpoint port (none: no endpoint)
+    #   @host   : prometheus endpoint host
+    #   @buckets: latency buckets (seconds)
+    # -----------------------------------------------------------------------------------
+    def __init__(self, port=None, host='127.0.0.1', buckets=BUCKETS):
+        self.__port    = port
+        self.__host    = host
+        self.__buckets = tuple(sorted(float(b) for b in buckets))
+        self.__lock    = Lock()
+        self.__series  = {}
+        self.__server  = None
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   measured keyword
+    # -----------------------------------------------------------------------------------
+    def wrap(self, name, keyword):
+        if iscoroutinefunction(keyword):
+            @wraps(keyword)
+            async def measured(*args, **kwargs):
+                series, start = self.__begin(name, ''), now()
+                try:
+                    value = await keyword(*args, **kwargs)
+                except BaseException:
+                    self.__end(series, start, True)
+                    raise
+                self.__end(series, start, False)
+                return value
+            return measured
+        @wraps(keyword)
+        def measured(*args, **kwargs):
+            series, start = self.__begin(name, ''), now()
+            try:
+                value = keyword(*args, **kwargs)
+            except BaseException:
+                self.__end(series, start, True)
+                raise
+            self.__end(series, start, False)
+            return value
+        return measured
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   measured proxy (by target)
+    # -----------------------------------------------------------------------------------
+    def wrap_proxy(self, proxy):
+        def target(server, func, args):
+            path = [server]
+            while func == 'proxy' and len(args) >= 2:
+                path.append(args[0])
+                func, args = args[1], args[2:]
+            return func, '.'.join(path)
+        if iscoroutinefunction(proxy):
+            @wraps(proxy)
+            async def measured(server, func, *args, **kwargs):
+                series, start = self.__begin(*target(server, func, args)), now()
+                try:
+                    value = await proxy(server, func, *args, **kwargs)
+                except BaseException:
+                    self.__end(series, start, True)
+                    raise
+                self.__end(series, start, False)
+                return value
+            return measured
+        @wraps(proxy)
+        def measured(server, func, *args, **kwargs):
+            series, start = self.__begin(*target(server, func, args)), now()
+            try:
+                value = proxy(server, func, *args, **kwargs)
+            except BaseException:
+                self.__end(series, start, True)
+                raise
+            self.__end(series, start, False)
+            return value
+        return measured
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   report: keyword -> {target -> series report}, '' is the local keyword
+    # -----------------------------------------------------------------------------------
+    def report(self):
+        out = {}
+        with self.__lock:
+            for (name, target), series in sorted(self.__series.items()):
+                out.setdefault(name, {})[target] = series.report()
+        return out
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   prometheus text format
+    # -----------------------------------------------------------------------------------
+    def prometheus(self):
+        lines = [
+            '# TYPE robotworker_calls_total counter',
+            '# TYPE robotworker_errors_total counter',
+            '# TYPE robotworker_inflight gauge',
+            '# TYPE robotworker_latency_seconds histogram']
+        with self.__lock:
+            for (name, target), series in sorted(self.__series.items()):
+                labels = f'keyword="{escape(name)}",target="{escape(target)}"'
+                lines += [
+                    f'robotworker_calls_total{{{labels}}} {series.calls}',
+                    f'robotworker_errors_total{{{labels}}} {series.errors}',
+                    f'robotworker_inflight{{{labels}}} {series.inflight}']
+                seen = 0
+                for bound, count in zip(self.__buckets + ('+Inf',), series.counts):
+                    seen += count
+                    lines.append(
+                        f'robotworker_latency_seconds_bucket{{{labels},le="{bound}"}} {seen}')
+                lines += [
+                    f'robotworker_latency_seconds_sum{{{labels}}} {series.total}',
+                    f'robotworker_latency_seconds_count{{{labels}}} {series.calls}']
+        return '\n'.join(lines) + '\n'
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   prometheus endpoint (GET /metrics), started only with a port
+    # -----------------------------------------------------------------------------------
+    def start(self):
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        from threading   import Thread
+        if self.__port is None or self.__server:
+            return
+        metrics = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    return self.send_error(404)
+                body = metrics.prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, *args):
+                pass
+        self.__server = ThreadingHTTPServer((self.__host, int(self.__port)), Handler)
+        self.__server.daemon_threads = True
+        Thread(target=self.__server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self.__server:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   helpers
+    # -----------------------------------------------------------------------------------
+    def __begin(self, name, target):
+        with self.__lock:
+            series = self.__series.get((name, target))
+            if series is None:
+                series = self.__series[(name, target)] = Series(self.__buckets)
+            series.inflight += 1
+        return series
+
+    def __end(self, series, start, failed):
+        spent = now() - start
+        with self.__lock:
+            series.inflight -= 1
+            series.observe(spent, failed)
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# label value (prometheus escaping)
+# -------------------------------------------------------------------------------------------------
+def escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# End
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Output}                                                   ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# imports
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from contextvars        import ContextVar
+from contextlib         import contextmanager
+from threading          import Lock, Condition
+from collections        import deque
+from time               import monotonic             as now
+from io                 import StringIO
+import sys
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# state
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+# capture of the running call (per thread / per task)
+CAPTURE = ContextVar('robotworker.capture', default=None)
+# install lock
+LOCK    = Lock()
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Capture
+#   stdout/stderr written by one call
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Capture(object):
+    PREFIXES = ('*TRACE*', '*DEBUG*', '*INFO*', '*HTML*', '*WARN*', '*ERROR*')
+
+    def __init__(self):
+        self.out = StringIO()
+        self.err = StringIO()
+
+    # -------------------------------------------------------------------------
+    # merged output (same rules as robotremoteserver)
+    # -------------------------------------------------------------------------
+    def value(self):
+        out = self.out.getvalue()
+        err = self.err.getvalue()
+        if out and err:
+            if not err.startswith(self.PREFIXES):
+                err = f'*INFO* {err}'
+            if not out.endswith('\n'):
+                out += '\n'
+        return out + err
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Stream
+#   incremental output of one call, read with a cursor (offset in characters)
+#   a read acknowledges the data before its cursor, unread data over the limit is dropped
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Stream(object):
+    def __init__(self, limit=1 << 20):
+        self.__limit  = int(limit)
+        self.__chunks = deque()
+        self.__start  = 0
+        self.__end    = 0
+        self.__size   = 0
+        self.__done   = False
+        self.__report = {}
+        self.__cond   = Condition()
+        self.updated  = now()
+
+    # -------------------------------------------------------------------------
+    # writer interface
+    # -------------------------------------------------------------------------
+    def write(self, data):
+        if not data:
+            return 0
+        with self.__cond:
+            self.__chunks.append(data)
+            self.__end  += len(data)
+            self.__size += len(data)
+            while self.__size > self.__limit and len(self.__chunks) > 1:
+                self.__drop()
+            self.updated = now()
+            self.__cond.notify_all()
+        return len(data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        pass
+
+    # -------------------------------------------------------------------------
+    # close stream with the call report (status, return, error)
+    # -------------------------------------------------------------------------
+    def close(self, **report):
+        with self.__cond:
+            self.__done   = True
+            self.__report = report
+            self.updated  = now()
+            self.__cond.notify_all()
+
+    def closed(self):
+        return self.__done
+
+    # -------------------------------------------------------------------------
+    # read data after cursor, waits up to 'wait' seconds for new data
+    # -------------------------------------------------------------------------
+    def read(self, cursor=0, wait=0):
+        with self.__cond:
+            self.__cond.wait_for(lambda: self.__end > cursor or self.__done, wait)
+            while self.__chunks and self.__start + len(self.__chunks[0]) <= cursor:
+                self.__drop()
+            out = dict(
+                data  =''.join(self.__chunks)[max(cursor - self.__start, 0):],
+                cursor=self.__end,
+                done  =self.__done)
+            if cursor < self.__start:
+                out['lost'] = self.__start - cursor
+            if self.__done:
+                out.update(self.__report)
+            return out
+
+    def __drop(self):
+        chunk = self.__chunks.popleft()
+        self.__start += len(chunk)
+        self.__size  -= len(chunk)
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Stream Table
+#   open streams by id, closed streams expire after ttl seconds
+#   streamed calls run on a bounded pool (calls over 'workers' wait for a free worker)
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class StreamTable(object):
+    def __init__(self, limit=1 << 20, ttl=300, workers=8):
+        self.__limit   = int(limit)
+        self.__ttl     = float(ttl)
+        self.__workers = int(workers)
+        self.__lock    = Lock()
+        self.__streams = {}
+        self.__pool    = None
+
+    def submit(self, func, *args):
+        from concurrent.futures import ThreadPoolExecutor
+        with self.__lock:
+            if self.__pool is None:
+                self.__pool = ThreadPoolExecutor(self.__workers, 'robotworker-stream')
+        return self.__pool.submit(func, *args)
+
+    def open(self):
+        from uuid import uuid4
+        sid = uuid4().hex
+        with self.__lock:
+            self.__expire()
+            stream = self.__streams[sid] = Stream(self.__limit)
+        return sid, stream
+
+    def get(self, sid):
+        with self.__lock:
+            if sid not in self.__streams:
+                raise KeyError(f'unknown stream {sid}')
+            return self.__streams[sid]
+
+    def discard(self, sid):
+        with self.__lock:
+            self.__streams.pop(sid, None)
+
+    def __expire(self):
+        limit = now() - self.__ttl
+        for sid, stream in list(self.__streams.items()):
+            if stream.closed() and stream.updated < limit:
+                del self.__streams[sid]
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Stream Capture
+#   stdout/stderr of one call go to a stream (in write order)
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class StreamCapture(Capture):
+    def __init__(self, stream):
+        self.out = self.err = stream
+
+    def value(self):
+        return ''
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Redirector
+#   replaces sys.stdout/sys.stderr, writes go to the capture of the running call
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Redirector(object):
+    def __init__(self, stream, name):
+        self.__stream = stream
+        self.__name   = name
+
+    def __target(self):
+        capture = CAPTURE.get()
+        return self.__stream if capture is None else getattr(capture, self.__name)
+
+    def write(self, data):
+        return self.__target().write(data)
+
+    def writelines(self, lines):
+        return self.__target().writelines(lines)
+
+    def flush(self):
+        return self.__target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.__stream, name)
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# install redirectors
+# -------------------------------------------------------------------------------------------------
+def install():
+    with LOCK:
+        if not isinstance(sys.stdout, Redirector):
+            sys.stdout = Redirector(sys.stdout, 'out')
+        if not isinstance(sys.stderr, Redirector):
+            sys.stderr = Redirector(sys.stderr, 'err')
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# capture output of the current context
+# -------------------------------------------------------------------------------------------------
+@contextmanager
+def capture(output=None):
+    install()
+    output = output or Capture()
+    token  = CAPTURE.set(output)
+    try:
+        yield output
+    finally:
+        CAPTURE.reset(token)
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# current context streams its output
+# -------------------------------------------------------------------------------------------------
+def streaming():
+    return isinstance(CAPTURE.get(), StreamCapture)
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# End
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
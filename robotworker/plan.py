@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Plan}                                                     ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# imports
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from collections        import namedtuple, ChainMap
+from types              import MappingProxyType
+from time               import time
+
+# internal
+from .helper            import compile_text
+from .tracing           import span
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Step
+#   name  : step name (keyword path)
+#   target: keyword path as called ([proxy, server, ..., keyword])
+#   call  : resolved callable
+#   bind  : context -> (args, kwargs)
+#   after : steps it waits for
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+Step = namedtuple('Step', 'name target call bind after')
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Plan
+#   compiled sequence, built once and run on each call
+#   params: sequence context (positional arguments map to its keys)
+#   graph : steps declare dependencies (concurrent run, timed report)
+#   digest: configuration fingerprint
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Plan(namedtuple('Plan', 'name params steps graph digest')):
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   run plan
+    #   @args, kargs: call arguments
+    #   @context    : worker context
+    #   @resolve    : resolves values returned by steps
+    #   @pool       : executor shared by the concurrent steps (none: one step at a time)
+    # -----------------------------------------------------------------------------------
+    def __call__(self, args, kargs, context, resolve=lambda v: v, pool=None):
+        context = ChainMap(kargs, dict(zip(self.params, args)), self.params, context)
+        run     = lambda step: traced(step, lambda: resolve(call(step, *step.bind(context))))
+        if not self.graph:
+            return {step.name: run(step) for step in self.steps}
+        # run dependency graph
+        report = {}
+        def timed(step):
+            start  = time()
+            result = run(step)
+            report[step.name] = {'return': result, 'start': start, 'end': time()}
+        run_graph(timed, self.steps, pool)
+        return {step.name: report[step.name] for step in self.steps}
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   describe plan
+    # -----------------------------------------------------------------------------------
+    def explain(self):
+        return dict(
+            name  =self.name,
+            params=dict(self.params),
+            mode  ='graph' if self.graph else 'serial',
+            digest=self.digest,
+            steps =[dict(
+                step  =step.name,
+                call  =step.target,
+                args  =getattr(step.bind, 'source', None),
+                after =list(step.after)) for step in self.steps])
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# compile a sequence configuration
+#   @find: keyword name -> callable
+#   step option: <args> | {after: [steps], args: <args>}, without 'after' a step follows
+#   the previous one
+# -------------------------------------------------------------------------------------------------
+def build_plan(name, config, find):
+    params   = MappingProxyType(dict(config.get('context', {})))
+    sequency = config.get('sequence', {})
+    steps, last, graph = [], (), False
+    for cmd, opt in sequency.items():
+        after = last
+        if isinstance(opt, dict) and 'after' in opt:
+            after = opt['after']
+            after = (after,) if isinstance(after, str) else tuple(after or ())
+            opt   = opt.get('args', [])
+            graph = True
+        for dep in after:
+            if dep not in sequency:
+                raise RuntimeError(f'sequence {name}, step {cmd}: unknown step {dep}')
+        # keyword resolved on each call (sequences may call sequences defined later)
+        path   = cmd.split('.')
+        target = [x for c in path[:-1] for x in ['proxy', c]] + path[-1:]
+        call   = build_call(name, cmd, target, find)
+        steps.append(Step(cmd, ' '.join(target), call, build_binder(opt), after))
+        last   = (cmd,)
+    return Plan(name, params, tuple(steps), graph, digest(config))
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# step call: keyword found when the step runs, unknown keywords fail that step only
+# -------------------------------------------------------------------------------------------------
+def build_call(name, cmd, target, find):
+    def call(*args, **kwargs):
+        try:
+            keyword = find(target[0])
+        except AttributeError:
+            raise RuntimeError(f'sequence {name}, step {cmd}: unknown keyword {target[0]}')
+        return keyword(*target[1:], *args, **kwargs)
+    return call
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# argument binder: context -> (args, kwargs)
+# -------------------------------------------------------------------------------------------------
+def build_binder(opt):
+    if isinstance(opt, str):
+        template = compile_text(opt)
+        if not template.pattern.search(opt):
+            # no placeholders, bind once
+            bind = constant(opt.split(), {})
+        else:
+            bind = lambda context: (template.substitute(context).split(), {})
+    elif isinstance(opt, dict):
+        bind = constant([], dict(opt))
+    else:
+        bind = constant(list(opt or []), {})
+    bind.source = opt
+    return bind
+
+def constant(args, kwargs):
+    return lambda context: (args, kwargs)
+
+def call(step, args, kwargs):
+    return step.call(*args, **kwargs)
+
+def traced(step, run):
+    with span(f'step {step.name}'):
+        return run()
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# configuration fingerprint
+# -------------------------------------------------------------------------------------------------
+def digest(config):
+    from hashlib import sha1
+    from json    import dumps
+    return sha1(dumps(config, default=str).encode()).hexdigest()
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# run a dependency graph, independent steps run concurrently
+#   one ready step runs on the calling thread, the others on the shared pool; steps still
+#   queued when the caller has to wait are taken back and run here (a bounded pool does not
+#   block on nested sequences, chains of steps never leave the caller)
+# -------------------------------------------------------------------------------------------------
+def run_graph(run, steps, pool=None):
+    from concurrent.futures import wait, FIRST_COMPLETED
+    from contextvars        import copy_context
+    pending = {step: set(step.after) for step in steps}
+    running = {}
+    done    = set()
+    def stop(error):
+        # stop scheduling, let running steps finish
+        pending.clear()
+        for future in [f for f in running if f.cancel()]:
+            del running[future]
+        wait(running)
+        raise error
+    while pending or running:
+        ready = [s for s, deps in pending.items() if deps <= done]
+        for step in ready:
+            del pending[step]
+        # steps share the caller context (output, loop)
+        for step in ready[1:] if pool else ():
+            running[pool.submit(copy_context().run, run, step)] = step
+        local = ready[:1] if pool else ready
+        if not local and not running:
+            names = [step.name for step in pending]
+            raise RuntimeError(f'sequence: circular dependency on {names}')
+        if not local and not any(future.done() for future in running):
+            stolen = next((future for future in running if future.cancel()), None)
+            local  = [running.pop(stolen)] if stolen else []
+        for step in local:
+            try:
+                copy_context().run(run, step)
+            except BaseException as error:
+                stop(error)
+            done.add(step.name)
+        if local:
+            continue
+        finished, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in finished:
+            step = running.pop(future)
+            if future.exception():
+                stop(future.exception())
+            done.add(step.name)
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# End
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Profiler}                                                 ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# imports
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from contextlib         import contextmanager
+from collections        import Counter
+from functools          import wraps
+from inspect            import iscoroutinefunction
+from threading          import Lock, Event, Thread, local, get_ident
+from time               import monotonic             as now, time
+from os.path            import basename
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Session
+#   one profile: cProfile stats of the profiled calls, stacks sampled while they run and
+#   tracemalloc differences of each call
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Session(object):
+    def __init__(self, name, calls, seconds, memory):
+        self.name     = name
+        self.calls    = calls
+        self.deadline = now() + seconds if seconds else None
+        self.memory   = memory
+        self.started  = time()
+        self.stopped  = None
+        self.admitted = 0
+        self.done     = 0
+        self.samples  = 0
+        self.stats    = None
+        self.stacks   = Counter()
+        self.sizes    = Counter()
+        self.counts   = Counter()
+        self.threads  = Counter()
+
+    def running(self):
+        return self.stopped is None
+
+    def matches(self, name):
+        return not self.name or self.name == name
+
+    def summary(self):
+        return dict(
+            name    =self.name,
+            running =self.running(),
+            calls   =self.done,
+            samples =self.samples,
+            memory  =self.memory,
+            seconds =round((self.stopped or time()) - self.started, 3))
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Profiler
+#   keywords are profiled only while a session runs (until n calls, a time window or a stop),
+#   one session at a time
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Profiler(object):
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   constructor
+    #   @interval: stack sampling interval in seconds (0: no sampling)
+    #   @frames  : tracemalloc frames by allocation
+    # -----------------------------------------------------------------------------------
+    def __init__(self, interval=0.005, frames=1):
+        self.__interval = float(interval)
+        self.__frames   = int(frames)
+        self.__lock     = Lock()
+        self.__local    = local()
+        self.__session  = None
+        self.__last     = None
+        self.__stop     = None
+        self.__tracing  = False
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   start a session
+    #   @name   : keyword to profile (empty: all keywords)
+    #   @calls  : stop after n calls (0: no limit)
+    #   @seconds: stop after n seconds (0: no limit)
+    #   @memory : tracemalloc differences of each call
+    # -----------------------------------------------------------------------------------
+    def start(self, name='', calls=0, seconds=0, memory=False):
+        with self.__lock:
+            if self.__session:
+                raise RuntimeError(f'profile of {self.__session.name or "all keywords"} running')
+            session = Session(name, int(calls), float(seconds), memory)
+            if memory:
+                import tracemalloc
+                self.__tracing = not tracemalloc.is_tracing()
+                if self.__tracing:
+                    tracemalloc.start(self.__frames)
+            self.__session, self.__last, self.__stop = session, session, Event()
+        Thread(target=self.__sample, args=(session, self.__stop), daemon=True).start()
+        return session.summary()
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   stop the running session (calls in flight are still added)
+    # -----------------------------------------------------------------------------------
+    def stop(self):
+        with self.__lock:
+            if self.__last is None:
+                raise RuntimeError('no profile')
+            self.__finish()
+            return self.__last.summary()
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   profiled keyword
+    # -----------------------------------------------------------------------------------
+    def wrap(self, name, keyword):
+        if iscoroutinefunction(keyword):
+            @wraps(keyword)
+            async def profiled(*args, **kwargs):
+                session = self.__session
+                if session is None or not session.matches(name):
+                    return await keyword(*args, **kwargs)
+                # other tasks of the loop running meanwhile are profiled too
+                with self.__profiled(session):
+                    return await keyword(*args, **kwargs)
+            return profiled
+        @wraps(keyword)
+        def profiled(*args, **kwargs):
+            session = self.__session
+            if session is None or not session.matches(name):
+                return keyword(*args, **kwargs)
+            with self.__profiled(session):
+                return keyword(*args, **kwargs)
+        return profiled
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   report of the last session
+    #   @format: pstats (text), collapsed (sampled stacks, flamegraph input), memory
+    #            (allocation differences) or raw (marshalled stats, pstats file)
+    #   @limit : lines (pstats, memory)
+    #   @sort  : pstats sort key
+    # -----------------------------------------------------------------------------------
+    def report(self, format='pstats', limit=30, sort='cumulative'):
+        from io import StringIO
+        from marshal import dumps
+        with self.__lock:
+            session = self.__last
+            if session is None:
+                raise RuntimeError('no profile')
+            if format == 'pstats':
+                if session.stats is None:
+                    return ''
+                out = StringIO()
+                session.stats.stream = out
+                session.stats.sort_stats(sort).print_stats(int(limit))
+                return out.getvalue()
+            if format == 'raw':
+                return dumps(session.stats.stats if session.stats else {})
+            if format == 'collapsed':
+                return ''.join(f'{stack} {count}\n' for stack, count in session.stacks.most_common())
+            if format == 'memory':
+                lines = sorted(session.sizes, key=lambda line: -abs(session.sizes[line]))
+                return ''.join(
+                    f'{session.sizes[line]:>+12} B {session.counts[line]:>+8}  {line}\n'
+                    for line in lines[:int(limit)])
+        raise ValueError(f'unknown profile format: {format}')
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   helpers
+    # -----------------------------------------------------------------------------------
+    @contextmanager
+    def __profiled(self, session):
+        from cProfile import Profile
+        # nested keywords (sequences, extensions) belong to the outer call
+        if getattr(self.__local, 'active', False) or not self.__admit(session):
+            yield
+            return
+        self.__local.active = True
+        ident, profile, before = get_ident(), Profile(), self.__snapshot(session)
+        with self.__lock:
+            session.threads[ident] += 1
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiler is active
+            profile = None
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            self.__local.active = False
+            self.__land(session, ident, profile, before)
+
+    def __admit(self, session):
+        with self.__lock:
+            if not session.running() or session.calls and session.admitted >= session.calls:
+                return False
+            session.admitted += 1
+            return True
+
+    def __land(self, session, ident, profile, before):
+        from pstats import Stats
+        after = self.__snapshot(session)
+        with self.__lock:
+            session.threads[ident] -= 1
+            if session.threads[ident] <= 0:
+                del session.threads[ident]
+            if profile:
+                profile.create_stats()
+                if profile.stats:
+                    if session.stats is None:
+                        session.stats = Stats(profile)
+                    else:
+                        session.stats.add(profile)
+            if before and after:
+                for stat in after.compare_to(before, 'lineno'):
+                    line = str(stat.traceback)
+                    session.sizes[line]  += stat.size_diff
+                    session.counts[line] += stat.count_diff
+            session.done += 1
+            if session is self.__session and session.calls and session.done >= session.calls:
+                self.__finish()
+
+    # allocations of the profiler itself are left out
+    def __snapshot(self, session):
+        import tracemalloc, cProfile, pstats
+        if not session.memory or not tracemalloc.is_tracing():
+            return None
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, module.__file__)
+            for module in (tracemalloc, cProfile, pstats)] + [tracemalloc.Filter(False, __file__)])
+
+    # sampler: stacks of the threads running profiled calls, ends the time window
+    def __sample(self, session, stop):
+        from sys import _current_frames
+        while not stop.wait(self.__interval or 0.1):
+            if session.deadline and now() >= session.deadline:
+                with self.__lock:
+                    if session is self.__session:
+                        self.__finish()
+                return
+            if not self.__interval:
+                continue
+            frames = _current_frames()
+            with self.__lock:
+                for ident in session.threads:
+                    if ident in frames:
+                        session.stacks[collapse(frames[ident])] += 1
+                        session.samples += 1
+
+    # finish the running session (lock held)
+    def __finish(self):
+        if self.__session is None:
+            return
+        self.__session.stopped = time()
+        self.__session = None
+        self.__stop.set()
+        if self.__tracing:
+            import tracemalloc
+            tracemalloc.stop()
+            self.__tracing = False
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# collapsed stack of a frame (root first, ; separated)
+# -------------------------------------------------------------------------------------------------
+def collapse(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f'{code.co_name} ({basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# End
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
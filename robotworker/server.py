@@ -0,0 +1,710 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Server}                                                   ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# imports
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+# ---------------------------------------------------------
+# external
+# ---------------------------------------------------------
+# functions
+from logging            import getLogger             as logger
+from inspect            import getmembers, getdoc
+from inspect            import isfunction, ismethod
+from inspect            import signature, Parameter
+from inspect            import iscoroutinefunction, isawaitable
+from functools          import partial
+from contextvars        import copy_context
+from sys                import exc_info
+import asyncio
+# objects
+from xmlrpc.server      import SimpleXMLRPCServer
+from xmlrpc.server      import SimpleXMLRPCRequestHandler
+from xmlrpc.client      import Binary, Fault
+from xmlrpc.client      import loads, dumps
+from contextvars        import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from threading          import Lock, Thread
+from socket             import SHUT_RD
+from robotremoteserver  import KeywordResult
+from robotremoteserver  import RobotRemoteServer
+from robotremoteserver  import SignalHandler
+
+# ---------------------------------------------------------
+# internal
+# ---------------------------------------------------------
+from .output            import capture
+from .codec             import HEADER, advertise, find
+from .codec             import load_call, dump_result, dump_fault
+from .tracing           import HEADER                as TRACE_HEADER
+from .tracing           import span, parse, bind, status
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# state
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+# event loop of the async engine (visible from executor threads)
+LOOP     = ContextVar('robotworker.loop', default=None)
+# accept time of the connection being served (threaded engine, first request)
+ACCEPTED = ContextVar('robotworker.accepted', default=None)
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# resolve a value returned by a keyword (async engine coroutines)
+#   called from executor threads, waits on the event loop, the coroutine sees the caller
+#   context (output capture)
+# -------------------------------------------------------------------------------------------------
+def resolve(value):
+    if not isawaitable(value):
+        return value
+    return asyncio.run_coroutine_threadsafe(
+        within(copy_context(), value), LOOP.get()).result()
+
+async def within(context, awaitable):
+    for var, val in context.items():
+        var.set(val)
+    return await awaitable
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Library
+#   remote library protocol on top of an application object
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Library(object):
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   constructor
+    #   @app     : application (Api)
+    #   @builtins: server keywords
+    # -----------------------------------------------------------------------------------
+    def __init__(self, app, builtins={}):
+        self.__app      = app
+        self.__builtins = dict(builtins, get_library=self.get_library)
+        self.__names    = [name for name in keywords(app) if name not in self.__builtins]
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   protocol
+    # -----------------------------------------------------------------------------------
+    def get_keyword_names(self):
+        return self.__names + list(self.__builtins)
+
+    def get_keyword_arguments(self, name):
+        return arguments(self.keyword(name))
+
+    def get_keyword_documentation(self, name):
+        if name == '__intro__':
+            return getdoc(self.__app) or ''
+        if name == '__init__':
+            return ''
+        return getdoc(self.keyword(name)) or ''
+
+    def get_keyword_tags(self, name):
+        return getattr(self.keyword(name), 'robot_tags', [])
+
+    def get_library(self, version=''):
+        return library(dict(keywords(self.__app), **self.__builtins), version)
+
+    def run_keyword(self, name, args, kwargs=None):
+        with span(f'execute {name}') as current:
+            return status(current, execute(self.keyword(name), args, kwargs))
+
+    async def run_keyword_async(self, name, args, kwargs=None, executor=None):
+        with span(f'execute {name}') as current:
+            return status(current, await execute_async(self.keyword(name), args, kwargs, executor))
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   find keyword
+    # -----------------------------------------------------------------------------------
+    def keyword(self, name):
+        if name in self.__builtins:
+            return self.__builtins[name]
+        return getattr(self.__app, name)
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# application keywords: name -> callable (public functions and methods)
+# -------------------------------------------------------------------------------------------------
+def keywords(app):
+    return {
+        name: kw for name, kw in getmembers(app)
+        if name[0] != '_' and (isfunction(kw) or ismethod(kw))}
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# library description: version (fingerprint) and keyword descriptions
+#   @version: version the caller has, only the version returns when it is current
+# -------------------------------------------------------------------------------------------------
+def library(members, version=''):
+    from .plan import digest
+    described = {name: describe(kw) for name, kw in members.items()}
+    current   = digest(described)
+    if version == current:
+        return dict(version=current)
+    return dict(version=current, keywords=described)
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# keyword description (arguments, documentation, tags and annotated types)
+# -------------------------------------------------------------------------------------------------
+def describe(keyword):
+    params = signature(keyword).parameters.values()
+    return dict(
+        args =arguments(keyword),
+        doc  =getdoc(keyword) or '',
+        tags =list(getattr(keyword, 'robot_tags', [])),
+        types={
+            param.name: getattr(param.annotation, '__name__', str(param.annotation))
+            for param in params if param.annotation is not Parameter.empty})
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# keyword arguments (robot format)
+# -------------------------------------------------------------------------------------------------
+def arguments(keyword):
+    out = []
+    for param in signature(keyword).parameters.values():
+        if param.kind == Parameter.VAR_POSITIONAL:
+            out.append(f'*{param.name}')
+            continue
+        if param.kind == Parameter.VAR_KEYWORD:
+            out.append(f'**{param.name}')
+            continue
+        if param.default is not Parameter.empty:
+            out.append(f'{param.name}={param.default}')
+            continue
+        out.append(param.name)
+    return out
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# decode binary arguments
+# -------------------------------------------------------------------------------------------------
+def decode(arg):
+    if isinstance(arg, list):
+        return [decode(v) for v in arg]
+    if isinstance(arg, dict):
+        return {k:decode(v) for k, v in arg.items()}
+    if isinstance(arg, Binary):
+        return arg.data
+    return arg
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# execute keyword, capture its output and build the remote report
+# -------------------------------------------------------------------------------------------------
+def execute(keyword, args, kwargs=None):
+    result = KeywordResult()
+    with capture() as output:
+        try:
+            value = keyword(*decode(args), **decode(kwargs or {}))
+        except Exception:
+            result.set_error(*exc_info())
+        else:
+            report(result, value)
+    result.set_output(output.value())
+    return result.data
+
+async def execute_async(keyword, args, kwargs=None, executor=None):
+    result = KeywordResult()
+    with capture() as output:
+        try:
+            call = partial(keyword, *decode(args), **decode(kwargs or {}))
+            if iscoroutinefunction(keyword):
+                value = await call()
+            else:
+                # blocking keyword, runs on the executor with the current context
+                value = await asyncio.get_running_loop().run_in_executor(
+                    executor, copy_context().run, call)
+            if isawaitable(value):
+                value = await value
+        except Exception:
+            result.set_error(*exc_info())
+        else:
+            report(result, value)
+    result.set_output(output.value())
+    return result.data
+
+def report(result, value):
+    try:
+        result.set_return(value)
+    except Exception:
+        result.set_error(*exc_info()[:2])
+    else:
+        result.set_status('PASS')
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Single Server
+#   robotremoteserver (one request at a time), keywords run through the library: output is
+#   captured per call instead of swapping sys.stdout, so background output (streams) keeps
+#   reaching its capture after the call that started it returns
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class SingleServer(RobotRemoteServer):
+    def __init__(self, app, host, port, port_file=None, allow_remote_stop=True):
+        self.__library = Library(app)
+        super().__init__(app, host=host, port=port, serve=False,
+                         port_file=port_file, allow_remote_stop=allow_remote_stop)
+        # traced calls, compact codecs (one request per connection, other clients wait
+        # for the server)
+        self._server.RequestHandlerClass = Handler
+        self._server._marshaled_dispatch = partial(marshaled, self._server)
+
+    def serve(self, log=True):
+        bind(*self.server_address[:2])
+        super().serve(log)
+
+    def run_keyword(self, name, args, kwargs=None):
+        if name == 'stop_remote_server':
+            return super().run_keyword(name, args, kwargs)
+        return self.__library.run_keyword(name, args, kwargs)
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Threaded Server
+#   xmlrpc server dispatching connections to a bounded thread pool
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class TracedHandler(SimpleXMLRPCRequestHandler):
+
+    # request received (request line read)
+    def parse_request(self):
+        from time import time
+        self.received = time()
+        return super().parse_request()
+
+    # traced calls: server span, queue wait since the connection was accepted (first
+    # request) or since the request was received
+    def do_POST(self):
+        accepted = ACCEPTED.get()
+        ACCEPTED.set(None)
+        start    = accepted or self.received
+        with span('rpc', 'SERVER', parse(self.headers.get(TRACE_HEADER)), start):
+            with span('queue', start=start):
+                pass
+            self._post()
+
+    def _post(self):
+        return SimpleXMLRPCRequestHandler.do_POST(self)
+
+    def log_message(self, format, *args):
+        logger().debug(format % args)
+
+class Handler(TracedHandler):
+    # compact codecs (xml otherwise)
+    def _post(self):
+        codec = find(self.headers.get('Content-Type'))
+        if codec is None:
+            return super()._post()
+        if not self.is_rpc_path_valid():
+            return self.report_404()
+        data = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = dispatch(codec, data, self.server._dispatch)
+        self.send_response(200)
+        self.send_header('Content-Type', codec.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # advertise codecs
+    def end_headers(self):
+        self.send_header(HEADER, advertise())
+        super().end_headers()
+
+class KeepAliveHandler(Handler):
+    # keep-alive
+    protocol_version = 'HTTP/1.1'
+
+    def handle_one_request(self):
+        super().handle_one_request()
+        # release the worker when other connections are waiting
+        if self.server.queued():
+            self.close_connection = True
+
+    # seconds an idle connection is kept (clients drop theirs before)
+    def end_headers(self):
+        headers = getattr(self, 'headers', None) or {}
+        if self.timeout and headers.get('Connection', '').lower() != 'close':
+            self.send_header('Keep-Alive', f'timeout={int(self.timeout)}')
+        super().end_headers()
+
+class ThreadedServer(SimpleXMLRPCServer):
+    allow_reuse_address = True
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   constructor
+    #   @app      : application (Api)
+    #   @workers  : thread pool size
+    #   @keepalive: seconds an idle connection holds a worker
+    #   @backlog  : listen queue size
+    # -----------------------------------------------------------------------------------
+    def __init__(self, app, host, port, workers=8, keepalive=5, backlog=64):
+        # handler settings
+        handler = type('Handler', (KeepAliveHandler,), dict(timeout=keepalive))
+        # server settings
+        self.request_queue_size = int(backlog)
+        super().__init__((host, int(port)), handler, logRequests=False)
+        # worker pool
+        self.__workers = int(workers)
+        self.__pool    = ThreadPoolExecutor(self.__workers, 'robotworker')
+        self.__lock    = Lock()
+        self.__stats   = dict(queued=0, active=0, served=0)
+        self.__open    = set()
+        # remote library
+        self.__library = Library(app, dict(
+            stop_remote_server=self.stop_remote_server,
+            get_server_status =self.get_server_status))
+        for func in [
+            self.__library.get_keyword_names,
+            self.__library.get_keyword_arguments,
+            self.__library.get_keyword_documentation,
+            self.__library.get_keyword_tags,
+            self.__library.run_keyword,
+            self.stop_remote_server]:
+            self.register_function(func)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   xmlrpc dispatch (traced marshalling)
+    # -----------------------------------------------------------------------------------
+    def _marshaled_dispatch(self, data, dispatch_method=None, path=None):
+        return marshaled(self, data, dispatch_method, path)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   serve until stopped
+    # -----------------------------------------------------------------------------------
+    def serve(self):
+        host, port = self.server_address
+        bind(host, port)
+        print(f'Robot Framework remote server at {host}:{port} started.')
+        with SignalHandler(self.stop):
+            self.serve_forever()
+        # wake up idle keep-alive connections
+        with self.__lock:
+            for request in self.__open:
+                try:
+                    request.shutdown(SHUT_RD)
+                except OSError:
+                    pass
+        self.__pool.shutdown()
+        self.server_close()
+        print(f'Robot Framework remote server at {host}:{port} stopped.')
+
+    def stop(self):
+        Thread(target=self.shutdown, daemon=True).start()
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   server keywords
+    # -----------------------------------------------------------------------------------
+    def stop_remote_server(self):
+        '''Stop the remote server.'''
+        self.stop()
+        return True
+
+    def get_server_status(self):
+        '''Return worker pool size and queued, active and served connections.'''
+        with self.__lock:
+            return dict(self.__stats, mode='threaded', workers=self.__workers)
+
+    def queued(self):
+        return self.__stats['queued']
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   dispatch connection to the pool
+    # -----------------------------------------------------------------------------------
+    def process_request(self, request, client_address):
+        from time import time
+        self.__count(queued=1)
+        self.__pool.submit(self.__process, request, client_address, time())
+
+    def __process(self, request, client_address, accepted):
+        with self.__lock:
+            self.__open.add(request)
+        self.__count(queued=-1, active=1)
+        token = ACCEPTED.set(accepted)
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            ACCEPTED.reset(token)
+            with self.__lock:
+                self.__open.discard(request)
+            self.shutdown_request(request)
+            self.__count(active=-1, served=1)
+
+    def __count(self, **delta):
+        with self.__lock:
+            for key, val in delta.items():
+                self.__stats[key] += val
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Async Server
+#   asyncio xmlrpc server, coroutine keywords run on the loop, blocking ones on an executor
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class AsyncServer(object):
+    # marshalling (as the xmlrpc dispatcher of the other modes)
+    use_builtin_types = False
+    allow_none        = False
+    encoding          = 'utf-8'
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   constructor
+    #   @app      : application (Api)
+    #   @workers  : executor size for blocking keywords
+    #   @keepalive: seconds an idle connection is kept
+    #   @backlog  : listen queue size
+    # -----------------------------------------------------------------------------------
+    def __init__(self, app, host, port, workers=8, keepalive=5, backlog=64):
+        self.__address  = (host, int(port))
+        self.__workers  = int(workers)
+        self.__keep     = float(keepalive)
+        self.__backlog  = int(backlog)
+        self.__stats    = dict(connections=0, running=0, served=0)
+        self.__pool     = ThreadPoolExecutor(self.__workers, 'robotworker')
+        # remote library
+        self.__library  = Library(app, dict(
+            stop_remote_server=self.stop_remote_server,
+            get_server_status =self.get_server_status))
+        self.__methods  = dict(
+            get_keyword_names        =self.__library.get_keyword_names,
+            get_keyword_arguments    =self.__library.get_keyword_arguments,
+            get_keyword_documentation=self.__library.get_keyword_documentation,
+            get_keyword_tags         =self.__library.get_keyword_tags,
+            run_keyword              =self.__run_keyword,
+            stop_remote_server       =self.stop_remote_server)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   serve until stopped
+    # -----------------------------------------------------------------------------------
+    def serve(self):
+        asyncio.run(self.__serve())
+
+    async def __serve(self):
+        from signal import SIGINT, SIGTERM
+        loop = asyncio.get_running_loop()
+        LOOP.set(loop)
+        self.__stop = asyncio.Event()
+        for sig in (SIGINT, SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.__stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        server = await asyncio.start_server(
+            self.__connection, *self.__address, backlog=self.__backlog, reuse_address=True)
+        host, port = server.sockets[0].getsockname()[:2]
+        bind(host, port)
+        print(f'Robot Framework remote server at {host}:{port} started.')
+        async with server:
+            await self.__stop.wait()
+        self.__pool.shutdown()
+        print(f'Robot Framework remote server at {host}:{port} stopped.')
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   server keywords
+    # -----------------------------------------------------------------------------------
+    async def stop_remote_server(self):
+        '''Stop the remote server.'''
+        asyncio.get_running_loop().call_soon(self.__stop.set)
+        return True
+
+    async def get_server_status(self):
+        '''Return executor size and open connections, running and served calls.'''
+        return dict(self.__stats, mode='async', workers=self.__workers)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   connection (HTTP/1.1 keep-alive)
+    # -----------------------------------------------------------------------------------
+    async def __connection(self, reader, writer):
+        self.__stats['connections'] += 1
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), self.__keep)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+                version, headers, body = request
+                codec = find(headers.get('content-type'))
+                with span('rpc', 'SERVER', parse(headers.get(TRACE_HEADER))):
+                    if codec is None:
+                        data = (await self.__dispatch(body)).encode('utf-8')
+                    else:
+                        data = await dispatch_async(codec, body, self.__call)
+                writer.write(response(data, version, headers, codec, self.__keep))
+                await writer.drain()
+                if not keep_alive(version, headers):
+                    break
+        finally:
+            self.__stats['connections'] -= 1
+            writer.close()
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   xmlrpc dispatch
+    # -----------------------------------------------------------------------------------
+    async def __dispatch(self, body):
+        encode = dict(allow_none=self.allow_none, encoding=self.encoding)
+        try:
+            with span('unmarshal'):
+                params, method = loads(body, use_builtin_types=self.use_builtin_types)
+            value = await self.__call(method, params)
+            with span('marshal'):
+                return dumps((value,), methodresponse=True, **encode)
+        except Fault as fault:
+            return dumps(fault, **encode)
+        except Exception as ex:
+            return dumps(Fault(1, f'{type(ex).__name__}:{ex}'), **encode)
+
+    async def __call(self, method, params):
+        if method not in self.__methods:
+            raise Exception(f'method "{method}" is not supported')
+        value = self.__methods[method](*params)
+        if isawaitable(value):
+            value = await value
+        return value
+
+    async def __run_keyword(self, name, args, kwargs=None):
+        self.__stats['running'] += 1
+        try:
+            return await self.__library.run_keyword_async(name, args, kwargs, self.__pool)
+        finally:
+            self.__stats['running'] -= 1
+            self.__stats['served']  += 1
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# read an HTTP request: (version, headers, body) or None on end of stream
+# -------------------------------------------------------------------------------------------------
+async def read_request(reader):
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    _, _, version = line.decode('latin-1').split(None, 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, _, val = line.decode('latin-1').partition(':')
+        headers[key.strip().lower()] = val.strip()
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return version.strip(), headers, body
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# keep connection open
+# -------------------------------------------------------------------------------------------------
+def keep_alive(version, headers):
+    connection = headers.get('connection', '').lower()
+    if version == 'HTTP/1.0':
+        return connection == 'keep-alive'
+    return connection != 'close'
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# build an HTTP response
+# -------------------------------------------------------------------------------------------------
+def response(body, version, headers, codec=None, keep=None):
+    head = [
+        'HTTP/1.1 200 OK',
+        f'Content-Type: {codec.content_type if codec else "text/xml"}',
+        f'Content-Length: {len(body)}',
+        f'Connection: {"keep-alive" if keep_alive(version, headers) else "close"}',
+        f'{HEADER}: {advertise()}']
+    # seconds an idle connection is kept (clients drop theirs before)
+    if keep and keep_alive(version, headers):
+        head.append(f'Keep-Alive: timeout={int(keep)}')
+    return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# dispatch a compact codec call (faults are encoded)
+# -------------------------------------------------------------------------------------------------
+def dispatch(codec, data, call):
+    try:
+        with span('unmarshal'):
+            method, params = load_call(codec, data)
+        value = call(method, params)
+        with span('marshal'):
+            return dump_result(codec, value)
+    except Fault as fault:
+        return dump_fault(codec, fault)
+    except Exception as ex:
+        return dump_fault(codec, Fault(1, f'{type(ex).__name__}:{ex}'))
+
+async def dispatch_async(codec, data, call):
+    try:
+        with span('unmarshal'):
+            method, params = load_call(codec, data)
+        value = await call(method, params)
+        with span('marshal'):
+            return dump_result(codec, value)
+    except Fault as fault:
+        return dump_fault(codec, fault)
+    except Exception as ex:
+        return dump_fault(codec, Fault(1, f'{type(ex).__name__}:{ex}'))
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# xmlrpc dispatch with marshalling spans (SimpleXMLRPCDispatcher._marshaled_dispatch)
+# -------------------------------------------------------------------------------------------------
+def marshaled(server, data, dispatch_method=None, path=None):
+    encode = dict(allow_none=server.allow_none, encoding=server.encoding)
+    try:
+        with span('unmarshal'):
+            params, method = loads(data, use_builtin_types=server.use_builtin_types)
+        if dispatch_method is not None:
+            value = dispatch_method(method, params)
+        else:
+            value = server._dispatch(method, params)
+        with span('marshal'):
+            response = dumps((value,), methodresponse=1, **encode)
+    except Fault as fault:
+        response = dumps(fault, **encode)
+    except BaseException as ex:
+        response = dumps(Fault(1, f'{type(ex)}:{ex}'), **encode)
+    return response.encode(server.encoding, 'xmlcharrefreplace')
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# build and run a server for the given mode (settings of other modes are ignored)
+# -------------------------------------------------------------------------------------------------
+def serve(app, host, port, mode='single', **settings):
+    servers = {'single': SingleServer, 'threaded': ThreadedServer, 'async': AsyncServer}
+    if mode not in servers:
+        raise RuntimeError(f'invalid server mode: {mode}')
+    server  = servers[mode]
+    allowed = signature(server.__init__).parameters
+    for name in [name for name in settings if name not in allowed]:
+        logger().warning(f'server: {name} is not a setting of {mode} mode, ignored')
+        del settings[name]
+    return server(app, host, port, **settings).serve()
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# End
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
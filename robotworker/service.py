@@ -11,9 +11,13 @@
 # -------------------------------------------------------------------------------------------------
 ###################################################################################################
 from subprocess         import Popen                 as build_server
-from xmlrpc.client      import ServerProxy           as build_proxy
 from robotremoteserver  import stop_remote_server    as stop_server
-from robotremoteserver  import test_remote_server    as test_server
+from time               import monotonic             as now
+from urllib.parse       import urlsplit
+from .transport         import Proxy                 as build_proxy
+from .transport         import PoolTransport         as build_transport
+from .transport         import AsyncTransport        as build_async_transport
+from .tracing           import span, status
 
 ###################################################################################################
 # -------------------------------------------------------------------------------------------------
@@ -25,19 +29,27 @@ class Service(object):
     # ###################################################################################
     # -----------------------------------------------------------------------------------
     #   constructor
+    #   @pool   : transport pool settings (size, idle, timeout, codec)
+    #   @timeout: startup timeout
     # -----------------------------------------------------------------------------------
-    def __init__(self, cmd, host, port, args:dict):
+    def __init__(self, cmd, host, port, args:dict, pool:dict={}, timeout=30):
         # build server command
         self.__cmd  = [cmd]
         self.__cmd += [f'--host={host}', f'--port={port}']
         self.__cmd += [f'--{k}={v}' for k, v in args.items()]
         # build proxy uri 
         self.__uri = f'http://{host}:{port}'
+        self.__address = (host, int(port))
 
-        # build server
-        self.__server = build_server(self.__cmd, shell=True)
+        # server (see start)
+        self.__server  = None
+        self.__timeout = float(timeout)
+        self.__startup = dict(status='stopped')
         # build proxy
-        self.__proxy  = build_proxy (self.__uri) 
+        self.__transport = build_transport(**pool)
+        self.__proxy     = build_proxy(self.__uri, transport=self.__transport)
+        # build async proxy (async engine)
+        self.__async     = build_async_transport(self.__uri, **pool)
  
     # ###################################################################################
     # -----------------------------------------------------------------------------------
@@ -45,7 +57,53 @@ class Service(object):
     # -----------------------------------------------------------------------------------
     def __del__(self):
         # kill process
-        self.__server.kill()
+        if self.__server:
+            self.__server.kill()
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    # start server process
+    # -----------------------------------------------------------------------------------
+    def start(self):
+        begin = now()
+        self.__server  = build_server(' '.join(self.__cmd), shell=True)
+        self.__started = now()
+        self.__startup = dict(status='starting', spawn=self.__started - begin)
+        return self
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    # wait until the server accepts connections (probe with backoff)
+    # -----------------------------------------------------------------------------------
+    def wait(self, timeout=None):
+        from socket import create_connection
+        from time   import sleep
+        end, delay, probes = now() + (timeout or self.__timeout), 0.005, 0
+        while True:
+            probes += 1
+            try:
+                create_connection(self.__address, timeout=1).close()
+                status = 'ready'
+                break
+            except OSError:
+                pass
+            if self.__server.poll() is not None:
+                status = 'exited'
+                break
+            if now() + delay > end:
+                status = 'timeout'
+                break
+            sleep(delay)
+            delay = min(delay * 2, 0.5)
+        self.__startup.update(status=status, ready=now() - self.__started, probes=probes)
+        return status == 'ready'
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    # get startup report
+    # -----------------------------------------------------------------------------------
+    def startup(self):
+        return self.__startup.copy()
     
     # ###################################################################################
     # -----------------------------------------------------------------------------------
@@ -54,25 +112,214 @@ class Service(object):
     def address(self):     
         return self.__uri
    
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    # get statistics
+    # -----------------------------------------------------------------------------------
+    def statistics(self):
+        return dict(
+            transport=self.__transport.statistics(),
+            async_transport=self.__async.statistics())
+
     # ###################################################################################
     # -----------------------------------------------------------------------------------
     # execute keyword
     # -----------------------------------------------------------------------------------
     def execute(self, name, *args, **kwargs):     
-        return self.__proxy.run_keyword(name, args, kwargs)
+        with span(f'call {name}', 'CLIENT', remote=self.__uri) as current:
+            return status(current, self.__proxy.run_keyword(name, args, kwargs))
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    # execute keyword (async engine)
+    # -----------------------------------------------------------------------------------
+    async def execute_async(self, name, *args, **kwargs):
+        with span(f'call {name}', 'CLIENT', remote=self.__uri) as current:
+            return status(current, await self.__async.call('run_keyword', name, args, kwargs))
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    # server process is running
+    # -----------------------------------------------------------------------------------
+    def alive(self):
+        return self.__server is not None and self.__server.poll() is None
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    # stop node (remote stop, kill on timeout)
+    # -----------------------------------------------------------------------------------
+    def stop(self, timeout=5):
+        from subprocess import TimeoutExpired
+        if not self.alive():
+            return
+        try:
+            stop_server(self.__uri, log=False)
+        except Exception:
+            pass
+        try:
+            self.__server.wait(timeout)
+        except TimeoutExpired:
+            self.__server.kill()
+            self.__server.wait()
+        self.__transport.close()
+        self.__async.close()
 
     # ###################################################################################
     # -----------------------------------------------------------------------------------
     # restart node
     # -----------------------------------------------------------------------------------
     def restart(self, timeout=5):
-        from time import time, sleep
-        end = time() + timeout
-        # send a stop command
-        stop_server(self.__uri)
-        while time() < end:
-            test_server(self.__uri)
-            
+        self.stop(timeout)
+        return self.start().wait()
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Routes
+#   addresses of the descendants (path -> uri) learned from the services routes, nested
+#   proxy chains (proxy a proxy b kw) go straight to the last service
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Routes(object):
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   constructor
+    #   @services: direct services (name -> Service)
+    #   @ttl     : seconds a learned table (and an unreachable address) is kept
+    #   @pool    : transport pool settings of the direct proxies
+    #   @fanout  : services asked at the same time
+    # -----------------------------------------------------------------------------------
+    def __init__(self, services, ttl=60, pool={}, fanout=16):
+        from threading import Lock
+        self.__services = services
+        self.__ttl      = float(ttl)
+        self.__pool     = dict(pool)
+        self.__fanout   = int(fanout)
+        self.__lock     = Lock()
+        self.__table    = None
+        self.__stamp    = 0.0
+        self.__blocked  = {}
+        self.__proxies  = {}
+        self.__verified = set()
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   routing table (learned once per ttl)
+    # -----------------------------------------------------------------------------------
+    def table(self):
+        with self.__lock:
+            if self.__table is None or now() - self.__stamp > self.__ttl:
+                self.__table, self.__stamp = self.__learn(), now()
+                self.__verified.clear()
+            return dict(self.__table)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   route a proxy chain: (uri, keyword, args) of the last service, None to relay
+    #   (the worker at the address is checked once per table)
+    # -----------------------------------------------------------------------------------
+    def route(self, server, name, args):
+        path = [server]
+        while name == 'proxy' and len(args) >= 2:
+            path.append(args[0])
+            name, args = args[1], args[2:]
+        if len(path) == 1:
+            return None
+        uri, identity = self.table().get('.'.join(path), (None, None))
+        if uri is None or identity is None:
+            return None
+        if now() - self.__blocked.get(uri, now() - 2 * self.__ttl) <= self.__ttl:
+            return None
+        if (uri, identity) not in self.__verified:
+            if self.__identity(uri) != identity:
+                self.block(uri)
+                return None
+            self.__verified.add((uri, identity))
+        return uri, name, args
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   address not reachable from here (relay for ttl seconds)
+    # -----------------------------------------------------------------------------------
+    def block(self, uri):
+        self.__blocked[uri] = now()
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   execute keyword on an address
+    # -----------------------------------------------------------------------------------
+    def execute(self, uri, name, *args, **kwargs):
+        with span(f'call {name}', 'CLIENT', remote=uri, routed=True) as current:
+            return status(current, self.__proxy(uri)[0].run_keyword(name, args, kwargs))
+
+    async def execute_async(self, uri, name, *args, **kwargs):
+        with span(f'call {name}', 'CLIENT', remote=uri, routed=True) as current:
+            return status(current, await self.__proxy(uri)[1].call('run_keyword', name, args, kwargs))
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   helpers
+    # -----------------------------------------------------------------------------------
+    def __proxy(self, uri):
+        if uri not in self.__proxies:
+            self.__proxies[uri] = (
+                build_proxy(uri, transport=build_transport(**self.__pool)),
+                build_async_transport(uri, **self.__pool))
+        return self.__proxies[uri]
+
+    def __identity(self, uri):
+        try:
+            report = self.__proxy(uri)[0].run_keyword('get_identity', [], {})
+        except Exception:
+            return None
+        return report.get('return') if report.get('status') == 'PASS' else None
+
+    # direct services and their routes ({path: [uri, identity]}), addresses the services
+    # bound to loopback or wildcard hosts are taken as addresses of the service host
+    def __learn(self):
+        from concurrent.futures import ThreadPoolExecutor
+        def learn(item):
+            name, service = item
+            routes = {name: [service.address(), None]}
+            try:
+                identity = service.execute('get_identity')
+                report   = service.execute('get_routes')
+            except Exception:
+                return routes
+            if identity.get('status') == 'PASS':
+                routes[name][1] = identity.get('return')
+            if report.get('status') != 'PASS':
+                return routes
+            host = urlsplit(service.address()).hostname
+            for path, entry in (report.get('return') or {}).items():
+                # older workers: address only (relayed)
+                uri, identity = entry if isinstance(entry, list) else (entry, None)
+                routes[f'{name}.{path}'] = [localize(uri, host), identity]
+            return routes
+        routes = {}
+        if not self.__services:
+            return routes
+        with ThreadPoolExecutor(min(len(self.__services), self.__fanout)) as pool:
+            for inner in pool.map(learn, self.__services.items()):
+                routes.update(inner)
+        return routes
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# address reported by a service on host: loopback and wildcard hosts are the service host
+# -------------------------------------------------------------------------------------------------
+LOCAL = {'localhost', '0.0.0.0', '::', '::1', ''}
+
+def localize(uri, host):
+    address = urlsplit(uri)
+    name    = address.hostname or ''
+    if not host or not (name in LOCAL or name.startswith('127.')):
+        return uri
+    netloc = f'[{host}]' if ':' in host else host
+    if address.port:
+        netloc += f':{address.port}'
+    return address._replace(netloc=netloc).geturl()
+
 ###################################################################################################
 # -------------------------------------------------------------------------------------------------
 # End
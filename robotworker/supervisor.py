@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Supervisor}                                               ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# imports
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from logging            import getLogger             as logger
+from threading          import Thread, Event, RLock
+from collections        import deque
+from time               import monotonic             as now
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Supervisor
+#   watches service processes and restarts them with exponential backoff
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Supervisor(Thread):
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   constructor
+    #   @services: services by name
+    #   @interval: seconds between checks
+    #   @backoff : first restart delay (doubles on each restart inside the window)
+    #   @delay   : max restart delay
+    #   @limit   : max restarts inside the window (crash loop)
+    #   @window  : crash loop window in seconds
+    # -----------------------------------------------------------------------------------
+    def __init__(self, services, interval=1, backoff=1, delay=30, limit=5, window=300):
+        super().__init__(name='robotworker-supervisor', daemon=True)
+        self.__services = services
+        self.__interval = float(interval)
+        self.__backoff  = float(backoff)
+        self.__delay    = float(delay)
+        self.__limit    = int(limit)
+        self.__window   = float(window)
+        self.__log      = logger()
+        self.__lock     = RLock()
+        self.__stop     = Event()
+        self.__state    = {name: self.__build_state() for name in services}
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   thread
+    # -----------------------------------------------------------------------------------
+    def run(self):
+        while not self.__stop.wait(self.__interval):
+            for name in self.__services:
+                with self.__lock:
+                    start = self.__check(name)
+                # the service starts on its own thread (other services are still checked,
+                # reports and restarts are not held meanwhile)
+                if start:
+                    Thread(target=self.__start, args=(name,), daemon=True,
+                           name=f'robotworker-supervisor-{name}').start()
+
+    def stop(self):
+        self.__stop.set()
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   restart a service on demand (clears crash loop)
+    # -----------------------------------------------------------------------------------
+    def restart(self, name):
+        with self.__lock:
+            state = self.__state[name]
+            if state['status'] == 'restarting':
+                raise RuntimeError(f'service {name}: restarting')
+            state.update(status='restarting', history=deque())
+            state['restarts'] += 1
+            if state['down'] is None:
+                state['down'] = now()
+        ready = self.__services[name].restart()
+        if not ready:
+            self.__services[name].stop()
+        with self.__lock:
+            self.__update(name, ready)
+        return ready
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   report: status, restarts and downtime per service
+    # -----------------------------------------------------------------------------------
+    def report(self):
+        with self.__lock:
+            out = {}
+            for name, state in self.__state.items():
+                down = state['down']
+                out[name] = dict(
+                    status  =state['status'],
+                    restarts=state['restarts'],
+                    downtime=state['downtime'] + (now() - down if down else 0))
+            return out
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   check a service (lock held), True when it is to be started
+    # -----------------------------------------------------------------------------------
+    def __check(self, name):
+        state   = self.__state[name]
+        service = self.__services[name]
+        if state['status'] in ('failed', 'restarting') or service.alive():
+            return False
+        # exit detected
+        if state['down'] is None:
+            state.update(down=now(), status='down', retry=now() + self.__next_delay(state))
+            self.__log.warning(f'service {name}: exited, restart in {state["retry"] - now():.2f}s')
+            return False
+        if now() < state['retry']:
+            return False
+        # crash loop
+        history = state['history']
+        while history and history[0] < now() - self.__window:
+            history.popleft()
+        if len(history) >= self.__limit:
+            state['status'] = 'failed'
+            self.__log.error(f'service {name}: {len(history)} restarts in {self.__window}s, giving up')
+            return False
+        # restart
+        history.append(now())
+        state['restarts'] += 1
+        state['status']    = 'restarting'
+        return True
+
+    def __start(self, name):
+        ready = self.__services[name].start().wait()
+        if not ready:
+            self.__services[name].stop()
+        with self.__lock:
+            self.__update(name, ready)
+
+    def __update(self, name, ready):
+        state = self.__state[name]
+        if ready:
+            state['downtime'] += now() - state['down']
+            state.update(down=None, status='running')
+            self.__log.info(f'service {name}: running')
+            return
+        # started but not ready (stopped by the caller): retry later
+        state.update(status='down', retry=now() + self.__next_delay(state))
+
+    def __next_delay(self, state):
+        return min(self.__backoff * 2 ** len(state['history']), self.__delay)
+
+    @staticmethod
+    def __build_state():
+        return dict(
+            status  ='running',
+            restarts=0,
+            downtime=0.0,
+            down    =None,
+            retry   =0.0,
+            history =deque())
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# End
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
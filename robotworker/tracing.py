@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Tracing}                                                  ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# imports
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from contextvars        import ContextVar
+from contextlib         import contextmanager
+from collections        import deque
+from threading          import Lock, Timer
+from time               import time
+from os                 import urandom
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# propagation
+#   calls carry the w3c traceparent header (00-<trace id>-<parent span id>-01), spans are
+#   recorded only inside a trace (started by the caller)
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+HEADER = 'traceparent'
+
+# span context of the running call: (trace id, span id)
+SPAN   = ContextVar('robotworker.span', default=None)
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Tracer
+#   finished spans (zipkin v2 format), kept in memory and appended to a jsonl file
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Tracer(object):
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   constructor
+    #   @file   : jsonl file (none: memory only)
+    #   @size   : spans kept in memory
+    #   @service: service name of the spans
+    #   @flush  : seconds spans may stay buffered before they reach the file
+    # -----------------------------------------------------------------------------------
+    def __init__(self, file=None, size=10000, service='robotworker', flush=1):
+        self.__file     = file
+        self.__handle   = None
+        self.__flush    = float(flush)
+        self.__timer    = None
+        self.__spans    = deque(maxlen=int(size))
+        self.__lock     = Lock()
+        self.__endpoint = dict(serviceName=service)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   local endpoint (the server address)
+    # -----------------------------------------------------------------------------------
+    def bind(self, host, port):
+        self.__endpoint.update(ipv4=host, port=int(port))
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   record a finished span
+    # -----------------------------------------------------------------------------------
+    def record(self, span):
+        from json import dumps
+        span['localEndpoint'] = self.__endpoint
+        with self.__lock:
+            self.__spans.append(span)
+            if not self.__file:
+                return
+            if self.__handle is None:
+                from atexit import register
+                self.__handle = open(self.__file, 'a')
+                register(self.close)
+            self.__handle.write(dumps(span) + '\n')
+            if self.__timer is None:
+                self.__timer = Timer(self.__flush, self.__sync)
+                self.__timer.daemon = True
+                self.__timer.start()
+
+    def __sync(self):
+        with self.__lock:
+            self.__timer = None
+            if self.__handle:
+                self.__handle.flush()
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   write buffered spans and close the file
+    # -----------------------------------------------------------------------------------
+    def close(self):
+        with self.__lock:
+            if self.__handle:
+                self.__handle.close()
+                self.__handle = None
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   spans of a trace
+    # -----------------------------------------------------------------------------------
+    def spans(self, trace):
+        with self.__lock:
+            return [dict(span) for span in self.__spans if span['traceId'] == trace]
+
+# tracer of this process (see configure)
+TRACER = Tracer()
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# configure the process tracer
+# -------------------------------------------------------------------------------------------------
+def configure(**settings):
+    global TRACER
+    TRACER = Tracer(**settings)
+    return TRACER
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# process tracer helpers
+# -------------------------------------------------------------------------------------------------
+def bind(host, port):
+    TRACER.bind(host, port)
+
+def recorded(trace):
+    return TRACER.spans(trace)
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# traceparent of the running call (None outside a trace)
+# -------------------------------------------------------------------------------------------------
+def traceparent():
+    context = SPAN.get()
+    return f'00-{context[0]}-{context[1]}-01' if context else None
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# span context from a traceparent (None when missing or invalid)
+# -------------------------------------------------------------------------------------------------
+def parse(value):
+    parts = (value or '').strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# new trace (the caller side of a traced call)
+# -------------------------------------------------------------------------------------------------
+@contextmanager
+def trace(name, **tags):
+    token = SPAN.set((urandom(16).hex(), None))
+    try:
+        with span(name, **tags) as current:
+            yield current
+    finally:
+        SPAN.reset(token)
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# span: child of the running span (or of parent), recorded when it ends
+#   @kind  : SERVER (incoming call), CLIENT (downstream call) or None (local)
+#   @start : start time in seconds (default: now)
+#   @return: span (tags may be added), None outside a trace
+# -------------------------------------------------------------------------------------------------
+@contextmanager
+def span(name, kind=None, parent=None, start=None, **tags):
+    context = parent or SPAN.get()
+    if context is None:
+        yield None
+        return
+    current = dict(
+        traceId  =context[0],
+        id       =urandom(8).hex(),
+        name     =name,
+        timestamp=int((start or time()) * 1e6),
+        tags     ={k: str(v) for k, v in tags.items()})
+    if context[1]:
+        current['parentId'] = context[1]
+    if kind:
+        current['kind'] = kind
+    token = SPAN.set((current['traceId'], current['id']))
+    try:
+        yield current
+    except BaseException as ex:
+        current['tags']['error'] = f'{type(ex).__name__}: {ex}'
+        raise
+    finally:
+        SPAN.reset(token)
+        current['duration'] = max(int(time() * 1e6) - current['timestamp'], 1)
+        TRACER.record(current)
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# tag a span with the status of a report (no span outside a trace)
+# -------------------------------------------------------------------------------------------------
+def status(current, report):
+    if current is not None and isinstance(report, dict):
+        current['tags']['status'] = str(report.get('status', ''))
+    return report
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# span tree: [(depth, span)] in call order
+# -------------------------------------------------------------------------------------------------
+def tree(spans):
+    ids      = {span['id'] for span in spans}
+    children = {}
+    for span in sorted(spans, key=lambda span: int(span['timestamp'])):
+        parent = span.get('parentId') if span.get('parentId') in ids else None
+        children.setdefault(parent, []).append(span)
+    out, pending = [], [(0, span) for span in reversed(children.get(None, []))]
+    while pending:
+        depth, span = pending.pop()
+        out.append((depth, span))
+        pending += [(depth + 1, child) for child in reversed(children.get(span['id'], []))]
+    return out
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# End
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
@@ -0,0 +1,462 @@
+#!/usr/bin/env python
+###################################################################################################
+###-                    {robotworker Transport}                                                ##-#
+###-                                                                                           ##-#
+###-Authors: Luis Monteiro                                                                     ##-#
+###################################################################################################
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# imports
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from http.client        import HTTPConnection        as build_connection
+from xmlrpc.client      import Transport
+from xmlrpc.client      import ProtocolError
+from xmlrpc.client      import Fault
+from xmlrpc.client      import loads, dumps
+from threading          import Lock
+from threading          import BoundedSemaphore
+from collections        import deque
+from time               import monotonic             as now
+from urllib.parse       import urlsplit
+from functools          import partial
+
+# internal
+from .codec             import HEADER, choose, find
+from .codec             import dump_call, load_result
+from .tracing           import HEADER                as TRACE_HEADER
+from .tracing           import traceparent
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Proxy
+#   xmlrpc server proxy, calls go through the transport codec (xml until negotiated)
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class Proxy(object):
+    # @failed: called on connection failures
+    def __init__(self, uri, transport=None, failed=None):
+        address          = urlsplit(uri)
+        self.__host      = address.netloc
+        self.__handler   = address.path or '/RPC2'
+        self.__transport = transport or PoolTransport(size=1)
+        self.__failed    = failed
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return partial(self.__call, name)
+
+    def __call(self, name, *params):
+        try:
+            return self.__transport.call(self.__host, self.__handler, name, *params)
+        except OSError:
+            if self.__failed:
+                self.__failed()
+            raise
+
+# codec response from a server without codecs: renegotiate and send again
+class Renegotiate(Exception):
+    pass
+
+# connection not established (nothing sent): the call may go to another address
+class Unreachable(ConnectionError):
+    pass
+
+# pooled connection closed by the peer before a response (nothing read): sent again
+class Closed(ConnectionResetError):
+    pass
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Pool Transport
+#   thread-safe xmlrpc transport, keeps a bounded pool of HTTP/1.1 keep-alive connections
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class PoolTransport(Transport):
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   constructor
+    #   @size   : max connections (and concurrent requests)
+    #   @idle   : seconds an unused connection is kept (below the keep-alive of the server,
+    #             the server keep-alive timeout is used when it is shorter)
+    #   @timeout: socket timeout
+    #   @codec  : preferred codec (negotiated by default, 'xml' keeps xml)
+    # -----------------------------------------------------------------------------------
+    def __init__(self, size=4, idle=4, timeout=None, codec=None):
+        # binary values as bytes (same as the compact codecs)
+        super().__init__(use_builtin_types=True)
+        self.verbose   = False
+        self.__prefer  = codec
+        self.__codec   = None
+        self.__slots   = BoundedSemaphore(int(size))
+        self.__lock    = Lock()
+        self.__free    = deque()
+        self.__idle    = float(idle)
+        self.__timeout = timeout
+        self.__stats   = dict(
+            size     =int(size),
+            connects =0,
+            reuses   =0,
+            evictions=0,
+            retries  =0)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   request (xmlrpc transport interface)
+    # -----------------------------------------------------------------------------------
+    def request(self, host, handler, request_body, verbose=False):
+        return self.__send(host, handler, request_body, None)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   call a remote method (negotiated codec or xml)
+    # -----------------------------------------------------------------------------------
+    def call(self, host, handler, method, *params):
+        codec = self.__codec
+        if codec is None:
+            body = dumps(params, method).encode('utf-8', 'xmlcharrefreplace')
+            return self.request(host, handler, body)[0]
+        try:
+            return self.__send(host, handler, dump_call(codec, method, params), codec)
+        except Renegotiate:
+            return self.call(host, handler, method, *params)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   negotiated codec name (xml until the server advertises one)
+    # -----------------------------------------------------------------------------------
+    def codec(self):
+        return self.__codec.name if self.__codec else 'xml'
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   send a request on a pooled connection
+    # -----------------------------------------------------------------------------------
+    def __send(self, host, handler, body, codec):
+        with self.__slots:
+            # a reused connection may be closed by the peer, retry once on a new one
+            # (only when no response was read, a partial response is not sent again)
+            for retry in (True, False):
+                conn, reused = self.__acquire(host)
+                try:
+                    return self.__request(conn, host, handler, body, codec)
+                except Closed:
+                    conn.close()
+                    if not (reused and retry):
+                        raise
+                    self.__count('retries')
+                except (Fault, Renegotiate):
+                    raise
+                except Exception:
+                    conn.close()
+                    raise
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   close all idle connections
+    # -----------------------------------------------------------------------------------
+    def close(self):
+        with self.__lock:
+            while self.__free:
+                self.__free.pop()[0].close()
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   statistics
+    # -----------------------------------------------------------------------------------
+    def statistics(self):
+        with self.__lock:
+            return dict(self.__stats, idle=len(self.__free), codec=self.codec())
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   send request and parse response on a given connection
+    # -----------------------------------------------------------------------------------
+    def __request(self, conn, host, handler, body, codec=None):
+        _, headers, _ = self.get_host_info(host)
+        headers = dict(headers or [])
+        headers.update({
+            'Content-Type': codec.content_type if codec else 'text/xml',
+            'User-Agent'  : self.user_agent,
+            'Connection'  : 'keep-alive'})
+        # trace context of the call
+        if traceparent():
+            headers[TRACE_HEADER] = traceparent()
+        try:
+            conn.request('POST', handler, body, headers)
+            resp = conn.getresponse()
+        except (BrokenPipeError, ConnectionResetError) as error:
+            # RemoteDisconnected included (closed before the status line)
+            raise Closed(f'{host}: {error}') from error
+        if resp.status != 200:
+            resp.read()
+            conn.close()
+            raise ProtocolError(
+                host + handler, resp.status, resp.reason, dict(resp.getheaders()))
+        self.__negotiate(resp.getheader(HEADER))
+        # codec response
+        if codec is not None:
+            data = resp.read()
+            self.__release(conn, resp)
+            if find(resp.getheader('Content-Type')) is not codec:
+                raise Renegotiate()
+            return load_result(codec, data)
+        # parse response (consumes the body, faults included)
+        try:
+            result = self.parse_response(resp)
+        except Fault:
+            self.__release(conn, resp)
+            raise
+        self.__release(conn, resp)
+        return result
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   acquire a connection (evict idle ones)
+    # -----------------------------------------------------------------------------------
+    def __acquire(self, host):
+        with self.__lock:
+            while self.__free:
+                conn, expires = self.__free.pop()
+                if expires < now():
+                    conn.close()
+                    self.__stats['evictions'] += 1
+                    continue
+                self.__stats['reuses'] += 1
+                return conn, True
+            self.__stats['connects'] += 1
+        chost, _, _ = self.get_host_info(host)
+        conn = build_connection(chost, timeout=self.__timeout)
+        try:
+            conn.connect()
+        except OSError as error:
+            raise Unreachable(f'{chost}: {error}') from error
+        return conn, False
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   release a connection to the pool (unless the server asked to close it)
+    # -----------------------------------------------------------------------------------
+    def __release(self, conn, resp):
+        if resp.will_close:
+            conn.close()
+            return
+        idle = kept(self.__idle, resp.getheader('Keep-Alive'))
+        with self.__lock:
+            self.__free.append((conn, now() + idle))
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   negotiate codec (advertised by the server)
+    # -----------------------------------------------------------------------------------
+    def __negotiate(self, advertised):
+        if self.__prefer != 'xml':
+            self.__codec = choose(advertised, self.__prefer)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   count event
+    # -----------------------------------------------------------------------------------
+    def __count(self, name):
+        with self.__lock:
+            self.__stats[name] += 1
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# Async Transport
+#   asyncio xmlrpc client, keeps a bounded pool of HTTP/1.1 keep-alive connections
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+class AsyncTransport(object):
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   constructor
+    #   @uri    : server address
+    #   @size   : max connections (and concurrent requests)
+    #   @idle   : seconds an unused connection is kept (as the pool transport)
+    #   @timeout: request timeout
+    #   @codec  : preferred codec (negotiated by default, 'xml' keeps xml)
+    # -----------------------------------------------------------------------------------
+    def __init__(self, uri, size=4, idle=4, timeout=None, codec=None):
+        address        = urlsplit(uri)
+        self.__prefer  = codec
+        self.__codec   = None
+        self.__host    = address.hostname
+        self.__port    = address.port or 80
+        self.__path    = address.path or '/RPC2'
+        from asyncio import Semaphore
+        self.__slots   = Semaphore(int(size))
+        self.__free    = []
+        self.__loop    = None
+        self.__idle    = float(idle)
+        self.__timeout = timeout
+        self.__stats   = dict(
+            size     =int(size),
+            connects =0,
+            reuses   =0,
+            evictions=0,
+            retries  =0)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   call a remote method
+    # -----------------------------------------------------------------------------------
+    async def call(self, method, *params):
+        from asyncio import wait_for
+        codec = self.__codec
+        if codec is None:
+            body = dumps(params, method).encode('utf-8', 'xmlcharrefreplace')
+        else:
+            body = dump_call(codec, method, params)
+        async with self.__slots:
+            # a reused connection may be closed by the peer, retry once on a new one
+            # (only when no response was read, a partial response is not sent again)
+            for retry in (True, False):
+                stream, reused = await self.__acquire()
+                try:
+                    data, headers = await wait_for(
+                        self.__request(stream, body, codec), self.__timeout)
+                except Closed:
+                    stream[1].close()
+                    if not (reused and retry):
+                        raise
+                    self.__stats['retries'] += 1
+                    continue
+                except BaseException:
+                    stream[1].close()
+                    raise
+                break
+        if self.__prefer != 'xml':
+            self.__codec = choose(headers.get(HEADER.lower()), self.__prefer)
+        # faults are raised here
+        if codec is None:
+            return loads(data, use_builtin_types=True)[0][0]
+        if find(headers.get('content-type')) is not codec:
+            return await self.call(method, *params)
+        return load_result(codec, data)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   close all idle connections
+    # -----------------------------------------------------------------------------------
+    def close(self):
+        from asyncio import get_running_loop
+        try:
+            current = get_running_loop()
+        except RuntimeError:
+            current = None
+        while self.__free:
+            writer = self.__free.pop()[0][1]
+            # connections belong to the loop that opened them
+            if self.__loop in (None, current) or self.__loop.is_closed():
+                writer.close()
+            else:
+                self.__loop.call_soon_threadsafe(writer.close)
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   statistics
+    # -----------------------------------------------------------------------------------
+    def statistics(self):
+        return dict(self.__stats, idle=len(self.__free), codec=self.codec())
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   negotiated codec name (xml until the server advertises one)
+    # -----------------------------------------------------------------------------------
+    def codec(self):
+        return self.__codec.name if self.__codec else 'xml'
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   send request and read response on a given connection
+    # -----------------------------------------------------------------------------------
+    async def __request(self, stream, body, codec=None):
+        reader, writer = stream
+        head = [
+            f'POST {self.__path} HTTP/1.1',
+            f'Host: {self.__host}:{self.__port}',
+            f'Content-Type: {codec.content_type if codec else "text/xml"}',
+            'Connection: keep-alive',
+            f'Content-Length: {len(body)}']
+        # trace context of the call
+        if traceparent():
+            head.append(f'{TRACE_HEADER}: {traceparent()}')
+        try:
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+            await writer.drain()
+            # status
+            line = await reader.readline()
+        except (BrokenPipeError, ConnectionResetError) as error:
+            raise Closed(f'{self.__host}:{self.__port}: {error}') from error
+        if not line:
+            raise Closed(f'{self.__host}:{self.__port}: connection closed by peer')
+        version, status, reason = (line.decode('latin-1').split(None, 2) + [''])[:3]
+        # headers
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, val = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = val.strip()
+        # body
+        if 'content-length' in headers:
+            data = await reader.readexactly(int(headers['content-length']))
+        else:
+            data = await reader.read()
+        if int(status) != 200:
+            writer.close()
+            raise ProtocolError(
+                f'{self.__host}:{self.__port}{self.__path}', int(status), reason.strip(), headers)
+        # recycle connection
+        close = headers.get('connection', '').lower()
+        if close == 'close' or (version == 'HTTP/1.0' and close != 'keep-alive'):
+            writer.close()
+        else:
+            self.__free.append((stream, now() + kept(self.__idle, headers.get('keep-alive'))))
+        return data, headers
+
+    # ###################################################################################
+    # -----------------------------------------------------------------------------------
+    #   acquire a connection (evict idle ones)
+    # -----------------------------------------------------------------------------------
+    async def __acquire(self):
+        from asyncio import get_running_loop
+        self.__loop = get_running_loop()
+        while self.__free:
+            stream, expires = self.__free.pop()
+            if expires < now() or stream[0].at_eof():
+                stream[1].close()
+                self.__stats['evictions'] += 1
+                continue
+            self.__stats['reuses'] += 1
+            return stream, True
+        self.__stats['connects'] += 1
+        from asyncio import open_connection
+        try:
+            return await open_connection(self.__host, self.__port), False
+        except OSError as error:
+            raise Unreachable(f'{self.__host}:{self.__port}: {error}') from error
+
+# #################################################################################################
+# -------------------------------------------------------------------------------------------------
+# seconds an unused connection is kept: idle, below the server keep-alive timeout when it is
+# advertised (Keep-Alive: timeout=n)
+# -------------------------------------------------------------------------------------------------
+def kept(idle, header):
+    for param in (header or '').split(','):
+        name, _, value = param.strip().partition('=')
+        if name.lower() == 'timeout' and value.strip().isdigit():
+            return min(idle, int(value) * 0.8)
+    return idle
+
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# End
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
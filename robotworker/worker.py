@@ -161,13 +161,14 @@ class Worker(object):
     # runner
     # -------------------------------------------------------------------------
     @arguments(
-        app =pop('app' ),
-        host=pop('host'),
-        port=pop('port'))
-    def runner(self, app, host, port):
-        from robotremoteserver import RobotRemoteServer
+        app   =pop('app' ),
+        host  =pop('host'),
+        port  =pop('port'),
+        server=pop('server'))
+    def runner(self, app, host, port, server):
+        from .server import serve
         # start robot worker with app context
-        with app: RobotRemoteServer(app, host=str(host), port=int(port))
+        with app: serve(app, host=str(host), port=int(port), **(server or {}))
 
     # -------------------------------------------------------------------------
     # process
@@ -0,0 +1,131 @@
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# cache: policies and cached keywords
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from concurrent.futures import ThreadPoolExecutor
+from threading          import Event
+from time               import sleep
+import asyncio
+import pytest
+
+from robotworker.cache import Policy, ResultCache
+
+class Counter(object):
+    def __init__(self):
+        self.calls = 0
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return (self.calls, args, kwargs)
+
+def test_hits_by_arguments():
+    keyword = Counter()
+    cached  = ResultCache({'kw': dict(ttl=60)}).wrap('kw', keyword)
+    assert cached(1) == cached(1) == (1, (1,), {})
+    assert cached(2) == (2, (2,), {})
+    assert keyword.calls == 2
+
+def test_without_arguments():
+    keyword = Counter()
+    cached  = ResultCache({'kw': dict(ttl=60, args=False)}).wrap('kw', keyword)
+    assert cached(1) == cached(2)
+    assert keyword.calls == 1
+
+def test_ttl():
+    keyword = Counter()
+    cache   = ResultCache({'kw': dict(ttl=0.05)})
+    cached  = cache.wrap('kw', keyword)
+    cached()
+    cached()
+    sleep(0.1)
+    cached()
+    assert keyword.calls == 2
+    stats = cache.statistics()['kw']
+    assert (stats['hits'], stats['misses']) == (1, 2)
+
+def test_size():
+    keyword = Counter()
+    cache   = ResultCache({'kw': dict(size=2)})
+    cached  = cache.wrap('kw', keyword)
+    for arg in (1, 2, 3, 1):
+        cached(arg)
+    assert keyword.calls == 4
+    assert cache.statistics()['kw']['evictions'] == 2
+
+def test_errors_are_not_cached():
+    calls = []
+    def keyword():
+        calls.append(1)
+        raise ValueError('failed')
+    cached = ResultCache({'kw': {}}).wrap('kw', keyword)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cached()
+    assert len(calls) == 2
+
+def test_single_flight():
+    started, release, calls = Event(), Event(), []
+    def keyword():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return 'value'
+    cache  = ResultCache({'kw': {}})
+    cached = cache.wrap('kw', keyword)
+    with ThreadPoolExecutor(4) as pool:
+        first = pool.submit(cached)
+        started.wait(2)
+        others = [pool.submit(cached) for _ in range(3)]
+        sleep(0.05)
+        release.set()
+        assert [f.result() for f in [first] + others] == ['value'] * 4
+    assert len(calls) == 1
+    assert cache.statistics()['kw']['shared'] == 3
+
+def test_single_flight_async():
+    calls = []
+    async def keyword():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'value'
+    cached = ResultCache({'kw': {}}).wrap('kw', keyword)
+    async def run():
+        return await asyncio.gather(*[cached() for _ in range(4)])
+    assert asyncio.run(run()) == ['value'] * 4
+    assert len(calls) == 1
+
+def test_invalidate():
+    keyword = Counter()
+    cache   = ResultCache({'kw': {}})
+    cached  = cache.wrap('kw', keyword)
+    cached(1)
+    cached(2)
+    assert cache.invalidate('kw', (1,)) == 1
+    cached(1)
+    cached(2)
+    assert keyword.calls == 3
+    assert cache.invalidate('kw') == 2
+    assert cache.invalidate() == 0
+    with pytest.raises(KeyError):
+        cache.invalidate('other')
+
+def test_proxy_paths():
+    proxy = Counter()
+    cache = ResultCache({'a.b.kw': {}})
+    calls = cache.wrap_proxy(proxy)
+    assert calls('a', 'proxy', 'b', 'kw', 1) == calls('a', 'proxy', 'b', 'kw', 1)
+    calls('a', 'kw', 1)
+    assert proxy.calls == 2
+    # invalidated by path and arguments as called
+    assert cache.invalidate('a.b.kw', (1,)) == 1
+    calls('a', 'proxy', 'b', 'kw', 1)
+    assert proxy.calls == 3
+
+def test_uncached_keyword():
+    keyword = Counter()
+    assert ResultCache({'kw': {}}).wrap('other', keyword) is keyword
+    assert ResultCache({'kw': {}}).wrap_proxy(keyword) is keyword
+
+def test_policy_key():
+    assert Policy(args=False).key((1,), {}) == ''
+    assert Policy().key((1,), dict(b=2, a=1)) == Policy().key((1,), dict(a=1, b=2))
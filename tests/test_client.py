@@ -0,0 +1,79 @@
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# client: keywords of nested services through the command line
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from os            import killpg
+from os.path       import dirname, abspath
+from signal        import SIGKILL
+from socket        import socket
+from subprocess    import Popen
+from sys           import executable
+from time          import monotonic, sleep
+import pytest
+import yaml
+
+from click.testing      import CliRunner
+from robotworker.client import Client, Environment, cli
+
+ROOT = dirname(dirname(abspath(__file__)))
+
+def free_port():
+    with socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+# root -> a -> b, the root caches a.b.get_identity
+@pytest.fixture(scope='module')
+def tree(tmp_path_factory):
+    path  = tmp_path_factory.mktemp('tree')
+    ports = [free_port() for _ in range(3)]
+    def conf(name, services={}, **extra):
+        with open(path / f'{name}.yml', 'w') as f:
+            yaml.safe_dump(dict(server=dict(mode='threaded'), services={
+                child: dict(
+                    cmd     =f'{executable} -m robotworker.worker',
+                    host    ='127.0.0.1',
+                    port    =port,
+                    settings=dict(conf=str(path / f'{child}.yml'), log=str(path / f'{child}.log')))
+                for child, port in services.items()}, **extra), f)
+    conf('b')
+    conf('a', dict(b=ports[2]))
+    conf('root', dict(a=ports[1]), cache={'a.b.get_identity': dict(ttl=60, args=False, size=1)})
+    root = Popen(
+        [executable, '-m', 'robotworker.worker', f'--conf={path / "root.yml"}',
+         f'--log={path / "root.log"}', f'--port={ports[0]}'],
+        cwd=ROOT, start_new_session=True)
+    uri, end = f'http://127.0.0.1:{ports[0]}', monotonic() + 30
+    while True:
+        try:
+            Client(uri).run('get_services')
+            break
+        except OSError:
+            if monotonic() > end or root.poll() is not None:
+                raise
+            sleep(0.1)
+    env = Environment(str(path / 'env'))
+    env.reset(uri)
+    env.save()
+    yield uri, str(path / 'env')
+    killpg(root.pid, SIGKILL)
+    root.wait()
+
+def test_cached_nested_keyword(tree):
+    uri, env = tree
+    runner   = CliRunner()
+    results  = [runner.invoke(cli, ['--env', env, '.', 'a.b.get_identity']) for _ in range(2)]
+    assert [result.exit_code for result in results] == [0, 0]
+    assert results[0].output == results[1].output
+    # the second call is a hit of the root cache, both are measured by the root
+    client = Client(uri)
+    cache  = client.run('get_cache')['a.b.get_identity']
+    assert (cache['misses'], cache['hits']) == (1, 1)
+    assert client.run('get_metrics')['get_identity']['a.b']['calls'] == 2
+
+def test_nested_keyword(tree):
+    uri, env = tree
+    result   = CliRunner().invoke(cli, ['--env', env, '.', 'a.b.get_services'])
+    assert result.exit_code == 0
+    assert yaml.safe_load(result.output) == {}
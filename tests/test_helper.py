@@ -0,0 +1,31 @@
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# helper: document format
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from robotworker.helper import format_data, compile_data
+
+def test_format_data():
+    data = dict(a='${x}-a', b=['${x}', 'y', dict(c='${x}.c')], d=dict(e='f'))
+    out  = format_data(data, dict(x='1'))
+    assert out == dict(a='1-a', b=['1', 'y', dict(c='1.c')], d=dict(e='f'))
+    # source untouched, untouched sub-trees shared
+    assert data['a'] == '${x}-a' and data['b'][2] == dict(c='${x}.c')
+    assert out['d'] is data['d']
+
+def test_format_data_after_changes():
+    data = dict(a='${x}-a')
+    assert format_data(data, dict(x='1')) == dict(a='1-a')
+    # new placeholders are substituted
+    data['b'] = '${x}-b'
+    assert format_data(data, dict(x='2')) == dict(a='2-a', b='2-b')
+    # removed ones are gone
+    del data['a']
+    assert format_data(data, dict(x='3')) == dict(b='3-b')
+
+def test_compiled_data():
+    data     = dict(a=['${x}', '${y}'], b='z')
+    compiled = compile_data(data)
+    assert compiled.format(dict(x=1, y=2)) == dict(a=['1', '2'], b='z')
+    assert compiled.format(dict(x=3, y=4)) == dict(a=['3', '4'], b='z')
+    assert sorted(compiled.paths()) == [('a', 0), ('a', 1)]
@@ -0,0 +1,79 @@
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# plan: sequences with dependency graphs
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from concurrent.futures import ThreadPoolExecutor
+from threading          import current_thread
+from time               import sleep
+import pytest
+
+from robotworker.plan import build_plan
+
+class Keywords(object):
+    def __init__(self):
+        self.threads = {}
+    def step(self, name, wait=0):
+        sleep(float(wait))
+        self.threads[name] = current_thread().name
+        return name
+    def fail(self):
+        raise ValueError('failed')
+
+# steps step0, step1, ... call keyword step
+def find(keywords):
+    return lambda key: getattr(keywords, key.rstrip('0123456789'))
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(2, 'step') as pool:
+        yield pool
+
+def test_chain_runs_on_caller(pool):
+    keywords = Keywords()
+    sequence = build_plan('s', dict(sequence={
+        'step0': {'after': [], 'args': ['a']},
+        'step1': {'after': ['step0'], 'args': ['b']}}), find(keywords))
+    report = sequence([], {}, {}, pool=pool)
+    assert [entry['return'] for entry in report.values()] == ['a', 'b']
+    assert set(keywords.threads.values()) == {current_thread().name}
+
+def test_independent_steps_run_concurrently(pool):
+    keywords = Keywords()
+    sequence = build_plan('s', dict(sequence={
+        f'step{i}': {'after': [], 'args': [f's{i}', '0.2']} for i in range(3)}),
+        find(keywords))
+    report = sequence([], {}, {}, pool=pool)
+    assert [entry['return'] for entry in report.values()] == ['s0', 's1', 's2']
+    starts = sorted(entry['start'] for entry in report.values())
+    assert starts[-1] - starts[0] < 0.15
+    assert len(set(keywords.threads.values())) == 3
+
+def test_nested_sequences_on_a_small_pool():
+    keywords = Keywords()
+    inner = build_plan('inner', dict(sequence={
+        f'step{i}': {'after': [], 'args': [f'i{i}', '0.05']} for i in range(3)}),
+        find(keywords))
+    with ThreadPoolExecutor(1, 'step') as pool:
+        keywords.inner = lambda: inner([], {}, {}, pool=pool)
+        outer = build_plan('outer', dict(sequence={
+            f'inner{i}': {'after': []} for i in range(3)}),
+            find(keywords))
+        report = outer([], {}, {}, pool=pool)
+    assert len(report) == 3
+    assert all(len(entry['return']) == 3 for entry in report.values())
+
+def test_failed_step(pool):
+    keywords = Keywords()
+    sequence = build_plan('s', dict(sequence={
+        'fail'  : {'after': []},
+        'step'  : {'after': ['fail'], 'args': ['a']}}), lambda key: getattr(keywords, key))
+    with pytest.raises(ValueError):
+        sequence([], {}, {}, pool=pool)
+    assert keywords.threads == {}
+
+def test_without_pool():
+    keywords = Keywords()
+    sequence = build_plan('s', dict(sequence={
+        'step'  : {'after': [], 'args': ['a']}}), lambda key: getattr(keywords, key))
+    assert sequence([], {}, {})['step']['return'] == 'a'
@@ -0,0 +1,74 @@
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# supervisor: restarts with fake services
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from threading import Event
+from time      import monotonic, sleep
+
+from robotworker.supervisor import Supervisor
+
+class Service(object):
+    def __init__(self, ready=True, delay=0):
+        self.running = True
+        self.starts  = 0
+        self.ready   = ready
+        self.delay   = delay
+        self.release = Event()
+    def alive(self):
+        return self.running
+    def start(self):
+        self.starts += 1
+        return self
+    def wait(self):
+        self.release.wait(self.delay)
+        self.running = self.ready
+        return self.ready
+    def stop(self):
+        self.running = False
+    def restart(self):
+        return self.start().wait()
+
+def wait_for(check, timeout=3):
+    end = monotonic() + timeout
+    while not check():
+        assert monotonic() < end
+        sleep(0.01)
+
+def test_restart_exited_service():
+    service    = Service()
+    supervisor = Supervisor(dict(a=service), interval=0.01, backoff=0.01)
+    supervisor.start()
+    try:
+        service.running = False
+        wait_for(lambda: supervisor.report()['a']['status'] == 'running' and service.starts)
+        assert supervisor.report()['a']['restarts'] == 1
+    finally:
+        supervisor.stop()
+
+def test_slow_start_does_not_hold_other_services():
+    slow, fast = Service(delay=10), Service()
+    supervisor = Supervisor(dict(slow=slow, fast=fast), interval=0.01, backoff=0.01)
+    supervisor.start()
+    try:
+        slow.running = False
+        wait_for(lambda: supervisor.report()['slow']['status'] == 'restarting')
+        # reports answer and the other service is restarted while slow one starts
+        fast.running = False
+        wait_for(lambda: fast.starts == 1 and supervisor.report()['fast']['status'] == 'running')
+        assert slow.starts == 1
+        slow.release.set()
+        wait_for(lambda: supervisor.report()['slow']['status'] == 'running')
+    finally:
+        supervisor.stop()
+
+def test_crash_loop():
+    service    = Service(ready=False)
+    supervisor = Supervisor(dict(a=service), interval=0.01, backoff=0.01, delay=0.01, limit=2)
+    supervisor.start()
+    try:
+        service.running = False
+        wait_for(lambda: supervisor.report()['a']['status'] == 'failed')
+        assert service.starts == 2
+    finally:
+        supervisor.stop()
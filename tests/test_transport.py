@@ -0,0 +1,124 @@
+###################################################################################################
+# -------------------------------------------------------------------------------------------------
+# transport: pooled connections, retries and keep-alive
+# -------------------------------------------------------------------------------------------------
+###################################################################################################
+from socket    import socket, SOL_SOCKET, SO_REUSEADDR
+from threading import Thread
+from time      import sleep
+import asyncio
+import pytest
+
+from robotworker.transport import Proxy, PoolTransport, AsyncTransport, Unreachable, kept
+
+BODY = (b"<?xml version='1.0'?><methodResponse><params><param><value><string>ok</string>"
+        b"</value></param></params></methodResponse>")
+HEAD = b'HTTP/1.1 200 OK\r\nContent-Type: text/xml\r\nContent-Length: %d\r\n\r\n' % len(BODY)
+
+# full request (headers and body), empty when the connection is closed
+def receive(conn):
+    data = b''
+    while b'\r\n\r\n' not in data:
+        chunk = conn.recv(65536)
+        if not chunk:
+            return b''
+        data += chunk
+    head, _, body = data.partition(b'\r\n\r\n')
+    size = int(next(line.split(b':')[1] for line in head.split(b'\r\n')
+                    if line.lower().startswith(b'content-length')))
+    while len(body) < size:
+        body += conn.recv(65536)
+    return data
+
+# xml-rpc server answering each connection with the given replies (None: close)
+def server(*replies):
+    sock = socket()
+    sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen()
+    requests = []
+    def serve():
+        while True:
+            conn, _ = sock.accept()
+            for reply in replies:
+                if not receive(conn):
+                    break
+                requests.append(reply)
+                if reply is None:
+                    break
+                conn.sendall(reply)
+            conn.close()
+    Thread(target=serve, daemon=True).start()
+    return f'http://127.0.0.1:{sock.getsockname()[1]}', requests
+
+# n calls (one loop for the async transport)
+def calls(uri, transport, n=1):
+    if isinstance(transport, AsyncTransport):
+        async def run():
+            out = []
+            for _ in range(n):
+                try:
+                    out.append(await transport.call('x'))
+                except Exception as ex:
+                    out.append(ex)
+            return out
+        return asyncio.run(run())
+    out = []
+    for _ in range(n):
+        try:
+            out.append(Proxy(uri, transport).x())
+        except Exception as ex:
+            out.append(ex)
+    return out
+
+@pytest.fixture(params=['pool', 'async'])
+def build(request):
+    def build(uri):
+        if request.param == 'pool':
+            return PoolTransport(codec='xml')
+        return AsyncTransport(uri, codec='xml')
+    return build
+
+def test_reuse(build):
+    uri, requests = server(HEAD + BODY, HEAD + BODY)
+    transport = build(uri)
+    assert calls(uri, transport, 2) == ['ok', 'ok']
+    assert transport.statistics()['connects'] == 1
+    assert transport.statistics()['reuses'] == 1
+
+def test_retry_closed_before_response(build):
+    # the server drops the kept connection when the second request arrives
+    uri, requests = server(HEAD + BODY, None)
+    transport = build(uri)
+    assert calls(uri, transport, 2) == ['ok', 'ok']
+    assert transport.statistics()['retries'] == 1
+    assert transport.statistics()['connects'] == 2
+
+def test_no_retry_after_partial_response(build):
+    uri, requests = server(HEAD + BODY, HEAD + BODY[:20])
+    transport = build(uri)
+    first, second = calls(uri, transport, 2)
+    assert first == 'ok' and isinstance(second, Exception)
+    assert transport.statistics()['retries'] == 0
+    assert len(requests) == 2
+
+def test_unreachable(build):
+    with socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        uri = f'http://127.0.0.1:{sock.getsockname()[1]}'
+    error, = calls(uri, build(uri))
+    assert isinstance(error, Unreachable)
+
+def test_idle_eviction():
+    uri, requests = server(HEAD + BODY, HEAD + BODY)
+    transport = PoolTransport(idle=0.1, codec='xml')
+    calls(uri, transport)
+    sleep(0.2)
+    calls(uri, transport)
+    assert transport.statistics()['evictions'] == 1
+
+def test_kept():
+    assert kept(4, None) == 4
+    assert kept(4, 'timeout=5') == 4
+    assert kept(4, 'timeout=2, max=100') == pytest.approx(1.6)
+    assert kept(4, 'max=100') == 4